@@ -17,11 +17,70 @@ try:
 except ImportError:                   # very old SoCo
     MusicLibrary = None
 
+try:
+    import sonos_xml                  # streaming topology / DIDL parser
+except ImportError:
+    sonos_xml = None
+
+try:
+    import sonos_hot                  # precompiled SOAP for the hot actions
+except ImportError:
+    sonos_hot = None
+
+try:
+    import sonos_graph                # run independent steps concurrently
+except ImportError:
+    sonos_graph = None
+
+try:
+    import sonos_cassette             # record / replay SOAP traffic (env-driven)
+    sonos_cassette.install()
+except ImportError:
+    pass
+
+try:
+    import sonos_hedge                # hedged idempotent reads (--hedge)
+    hedger = sonos_hedge.Hedger()
+except ImportError:
+    hedger = None
+
+try:
+    import sonos_deadline             # whole-run budget (--deadline 1.5s)
+    deadline = sonos_deadline.Deadline.from_argv()
+except ImportError:
+    deadline = None
+
 config.REQUEST_TIMEOUT = 4
 config.EVENTS_MODULE   = None         # disable async listener thread
 
 
 # ── helpers ─────────────────────────────────────────────
+def call(fn, *args):
+    """Network call, trimmed to the run deadline when one is set."""
+    return deadline.call(fn, *args) if deadline else fn(*args)
+
+
+def read(spk, fn, *args):
+    """Idempotent read – hedged against a slow speaker when enabled."""
+    if hedger:
+        return call(hedger.call, spk.ip_address, fn, *args)
+    return call(fn, *args)
+
+
+def transport_state(spk):
+    if sonos_hot:
+        return sonos_hot.transport_state(spk.ip_address)
+    return spk.get_current_transport_info()['current_transport_state']
+
+
+def phase(name):
+    if deadline: deadline.phase(name)
+
+
+def out_of_time():
+    return bool(deadline and deadline.exhausted())
+
+
 def connect(ip):
     try:  return SoCo(ip)
     except SoCoException: return None
@@ -37,13 +96,32 @@ def queue_empty(spk):
 
 def current_uri(spk):
     try:
-        return spk.get_current_track_info().get("uri", "")
+        return read(spk, spk.get_current_track_info).get("uri", "")
     except SoCoException:
         return ""
 
 
+def coordinator_ip(spk, groups=None):
+    """Coordinator IP for spk – from streamed topology when we have it."""
+    if groups:
+        g = sonos_xml.group_of(groups, spk.ip_address)
+        if g:
+            return g["coordinator"]
+    return spk.group.coordinator.ip_address
+
+
 def play_station(spk, fav_name="Eclectic Rock Radio"):
-    """Modern MusicLibrary → legacy → test tone fallback."""
+    """Streamed favorites → MusicLibrary → legacy → test tone fallback."""
+    if sonos_xml:
+        try:
+            uri = sonos_xml.find_favorite(
+                sonos_xml.fetch_favorites_didl(spk), fav_name
+            )
+            if uri:
+                spk.play_uri(uri)
+                return
+        except Exception:
+            pass
     if MusicLibrary:
         try:
             fav = next(
@@ -83,7 +161,7 @@ def safe_unjoin(spk):
 
 def resume_from_other(src, dest):
     try:
-        info = src.get_current_track_info()
+        info = read(src, src.get_current_track_info)
         uri  = info.get("uri")
         if not uri: return False
         pos  = info.get("position")
@@ -96,49 +174,118 @@ def resume_from_other(src, dest):
         return False
 
 
-# ── connect ─────────────────────────────────────────────
-house = connect(HOUSE_IP) or sys.exit("House unreachable.")
-gym   = connect(GYM_IP)
-
-# Kick Gym out if following House
-if gym and gym.group.coordinator.ip_address == HOUSE_IP:
-    safe_unjoin(gym)
-
-# Is House following someone else?
-try:
-    external = house.group.coordinator.ip_address != HOUSE_IP
-except SoCoException:
-    external = False
-
-if external:
-    other = house.group.coordinator
-    resumed = resume_from_other(other, house)
-    safe_unjoin(house)
-    if not resumed:
-        time.sleep(0.5)
-        play_station(house)
-    action = "play"
+def toggle(external, house_coord=None, state=None):
+    """Play / pause House; returns the action taken."""
+    if external:
+        other = SoCo(house_coord)
+        resumed = resume_from_other(other, house)
+        safe_unjoin(house)
+        if not resumed:
+            time.sleep(0.5)
+            play_station(house)
+        return "play"
 
-else:
-    state = house.get_current_transport_info()['current_transport_state']
+    if state is None:
+        state = read(house, transport_state, house)
 
     if state == "PLAYING":
-        house.pause(); action = "pause"
+        house.pause(); return "pause"
 
     elif state == "PAUSED_PLAYBACK":
         # ▶️  Resume exactly where we paused
         if current_uri(house):
-            house.play(); action = "play"
+            house.play(); return "play"
         else:                      # rare: URI vanished → start station
-            play_station(house); action = "play"
+            play_station(house); return "play"
 
     else:                          # STOPPED / NO_MEDIA
         if queue_empty(house) or not current_uri(house):
             play_station(house)
-        house.play(); action = "play"
+        house.play(); return "play"
+
+
+# ── connect ─────────────────────────────────────────────
+phase("discovery")
+house = connect(HOUSE_IP) or sys.exit("House unreachable.")
+gym   = connect(GYM_IP)
+
+
+# ── steps ───────────────────────────────────────────────
+# The topology read and House's transport state don't depend on each other,
+# and the Gym kick-out doesn't need to finish before House is toggled.
+def step_topology(r):
+    """One topology read covers both House and Gym."""
+    if not sonos_xml:
+        return None
+    try:    return read(house, sonos_xml.fetch_zone_groups, house)
+    except Exception: return None
+
+
+def step_state(r):
+    """House transport state, read alongside the topology."""
+    try:    return read(house, transport_state, house)
+    except SoCoException: return None          # toggle() reads it again
+
+
+def step_kick_gym(r):
+    """Kick Gym out if following House."""
+    try:
+        if gym and call(coordinator_ip, gym, r["topology"]) == HOUSE_IP:
+            call(safe_unjoin, gym)
+    except SoCoException:
+        if not out_of_time():
+            raise
+
+
+def step_toggle(r):
+    # Is House following someone else?
+    house_coord = None
+    try:
+        house_coord = call(coordinator_ip, house, r["topology"])
+        external = house_coord != HOUSE_IP
+    except SoCoException:
+        external = False
+    try:
+        return call(toggle, external, house_coord, None if external else r["state"]), "succeeded"
+    except SoCoException:
+        if not out_of_time():
+            raise
+        return "none", "pending"
+
+
+STEPS = [
+    ("topology", step_topology, ()),
+    ("state",    step_state,    ()),
+    ("kick_gym", step_kick_gym, ("topology",)),
+    ("toggle",   step_toggle,   ("topology", "state")),
+]
+
+# ── toggle ──────────────────────────────────────────────
+# Steps overlap, so the deadline gives them one shared phase.
+phase("action")
+flow = None
+if sonos_graph:
+    flow = sonos_graph.Graph(STEPS)
+    results = flow.run()
+else:
+    results = {}
+    for name, fn, _ in STEPS: results[name] = fn(results)
+action, house_status = results["toggle"]
 
 # ── summary ─────────────────────────────────────────────
-print(json.dumps({
+result = {
     "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
     "action"   : action.upper(),
-}, indent=2))
+}
+if flow:
+    result["graph"] = flow.summary()
+if hedger and hedger.enabled:
+    result["hedge"] = hedger.summary()
+if deadline and deadline.limited:
+    result["rooms"] = {
+        "succeeded": ["House"] if house_status == "succeeded" else [],
+        "skipped"  : [],
+        "pending"  : ["House"] if house_status == "pending" else [],
+    }
+    result["deadline"] = deadline.summary()
+print(json.dumps(result, indent=2))
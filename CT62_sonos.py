@@ -31,46 +31,47 @@ ROOM_IP = {
     "Sonos-48A6B82EC320": "192.168.25.27",
 }
 
-# ── IMPORTS & GLOBALS ───────────────────────────────────
-from soco import SoCo, config
-from soco.exceptions import SoCoException
-import json, datetime
+FALLBACK_URI = None               # station for rooms with nothing to play (optional)
 
-config.REQUEST_TIMEOUT = 4        # keeps calls snappy on iOS
+# ── TOGGLE ──────────────────────────────────────────────
+try:
+    import sonos_site             # shared toggle_all flow + optional helpers
+except ImportError:
+    sonos_site = None
 
-# ── BUILD UNIQUE COORDINATOR LIST ───────────────────────
-coordinators = {}                 # ip → SoCo object
+if sonos_site:
+    sonos_site.run(ROOM_IP, __file__, FALLBACK_URI)
+else:                             # plain sequential toggle, SoCo only
+    from soco import SoCo, config
+    from soco.exceptions import SoCoException
+    import json, datetime
 
-for ip in ROOM_IP.values():
-    try:
-        spk   = SoCo(ip)
-        coord = spk.group.coordinator
-        coordinators[coord.ip_address] = coord
-    except SoCoException as e:
-        print(f"# Skipping {ip}: {e}")
+    config.REQUEST_TIMEOUT = 4    # keeps calls snappy on iOS
 
-if not coordinators:
-    raise SystemExit("No reachable Sonos speakers!")
+    coordinators = {}             # ip → SoCo object
+    for ip in ROOM_IP.values():
+        try:
+            coord = SoCo(ip).group.coordinator
+            coordinators[coord.ip_address] = coord
+        except SoCoException as e:
+            print(f"# Skipping {ip}: {e}")
 
-# ── DETERMINE CURRENT GLOBAL STATE ──────────────────────
-any_playing = any(
-    c.get_current_transport_info()['current_transport_state'] == "PLAYING"
-    for c in coordinators.values()
-)
+    if not coordinators:
+        raise SystemExit("No reachable Sonos speakers!")
 
-# ── ACT ON GROUP COORDINATORS ───────────────────────────
-action = "pause" if any_playing else "play"
+    any_playing = any(
+        c.get_current_transport_info()['current_transport_state'] == "PLAYING"
+        for c in coordinators.values()
+    )
+    action = "pause" if any_playing else "play"
+    for c in coordinators.values():
+        try:
+            getattr(c, action)()  # calls c.pause() or c.play()
+        except SoCoException as e:
+            print(f"# {c.player_name}: {e}")
 
-for c in coordinators.values():
-    try:
-        getattr(c, action)()      # calls c.pause() or c.play()
-    except SoCoException as e:
-        print(f"# {c.player_name}: {e}")
-
-# ── RETURN SUMMARY (useful in Shortcuts) ────────────────
-result = {
-    "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
-    "action"   : action.upper(),
-    "targets"  : [c.player_name for c in coordinators.values()],
-}
-print(json.dumps(result, indent=2))
+    print(json.dumps({
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "action"   : action.upper(),
+        "targets"  : [c.player_name for c in coordinators.values()],
+    }, indent=2))
@@ -0,0 +1,147 @@
+"""
+bench_sonos_hot.py
+────────────────────────────────────────────────────────────
+Micro-benchmark: per-call CPU time and memory of the hot-action layer
+(sonos_hot) against SoCo's own path, network excluded.  Allocation cost is
+reported as the tracemalloc peak of one call.
+
+  SoCo path:  Service.build_command() + Service.unwrap_arguments()
+              (handle_upnp_error() for a fault)
+  Hot path:   precompiled envelope lookup + the status check send() runs
+              on the response (sonos_hot._body) + sonos_hot.field() slice
+
+Responses are canned copies of what a Sonos Port returns; the topology case
+uses the 32-zone document from bench_sonos_xml.
+
+    python bench_sonos_hot.py [calls]
+"""
+
+from xml.sax.saxutils import escape
+import json, sys, time, tracemalloc
+
+from soco import SoCo
+from soco.exceptions import SoCoUPnPException
+from soco.services import AVTransport, ZoneGroupTopology
+
+import sonos_hot
+from bench_sonos_xml import make_topology
+
+
+def response(action, service, args):
+    inner = "".join(f"<{k}>{v}</{k}>" for k, v in args.items())
+    return (
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+        's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"><s:Body>'
+        f'<u:{action}Response xmlns:u="urn:schemas-upnp-org:service:{service}:1">'
+        f'{inner}</u:{action}Response></s:Body></s:Envelope>'
+    )
+
+
+TRANSPORT = response("GetTransportInfo", "AVTransport", {
+    "CurrentTransportState": "PLAYING", "CurrentTransportStatus": "OK", "CurrentSpeed": "1",
+})
+PLAY = response("Play", "AVTransport", {})
+FAULT = (
+    '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+    's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"><s:Body><s:Fault>'
+    '<faultcode>s:Client</faultcode><faultstring>UPnPError</faultstring><detail>'
+    '<UPnPError xmlns="urn:schemas-upnp-org:control-1-0"><errorCode>701</errorCode>'
+    '</UPnPError></detail></s:Fault></s:Body></s:Envelope>'
+)
+ZGS  = response("GetZoneGroupState", "ZoneGroupTopology",
+                {"ZoneGroupState": escape(make_topology())})
+
+
+# requests hands SoCo .text and sonos_hot .content – both already decoded /
+# raw before either parser runs, so neither conversion is timed
+class Canned:
+    """Stand-in for a requests.Response – just what sonos_hot._body reads."""
+    def __init__(self, status, text):
+        self.status_code, self.text, self.content = status, text, text.encode()
+
+    def raise_for_status(self):
+        pass
+
+
+def hot(action, canned):
+    return sonos_hot._body(canned, "127.0.0.1", action)
+
+
+def error_code(fn):
+    try:
+        fn()
+    except SoCoUPnPException as e:
+        return e.error_code
+    return None
+
+
+TRANSPORT_R, PLAY_R, ZGS_R = (Canned(200, r) for r in (TRANSPORT, PLAY, ZGS))
+FAULT_R = Canned(500, FAULT)
+
+
+# ── the two paths ───────────────────────────────────────
+spk = SoCo("127.0.0.1")
+avt = AVTransport(spk)
+zgt = ZoneGroupTopology(spk)
+
+CASES = {
+    "GetTransportInfo": (
+        lambda: avt.unwrap_arguments(
+            (avt.build_command("GetTransportInfo", [("InstanceID", 0)]), TRANSPORT)[1]
+        )["CurrentTransportState"],
+        lambda: sonos_hot.field(
+            (sonos_hot.HOT["GetTransportInfo"], hot("GetTransportInfo", TRANSPORT_R))[1],
+            b"CurrentTransportState",
+        ).decode(),
+    ),
+    "Play": (
+        lambda: avt.unwrap_arguments(
+            (avt.build_command("Play", [("InstanceID", 0), ("Speed", 1)]), PLAY)[1]
+        ) == {},
+        lambda: (sonos_hot.HOT["Play"], hot("Play", PLAY_R))[1] == PLAY_R.content,
+    ),
+    "Play (701 fault)": (
+        lambda: error_code(lambda: avt.handle_upnp_error(
+            (avt.build_command("Play", [("InstanceID", 0), ("Speed", 1)]), FAULT)[1]
+        )),
+        lambda: error_code(lambda: (sonos_hot.HOT["Play"], hot("Play", FAULT_R))[1]),
+    ),
+    "GetZoneGroupState": (
+        lambda: zgt.unwrap_arguments(
+            (zgt.build_command("GetZoneGroupState", []), ZGS)[1]
+        )["ZoneGroupState"],
+        lambda: sonos_hot.unescape(sonos_hot.field(
+            (sonos_hot.HOT["GetZoneGroupState"], hot("GetZoneGroupState", ZGS_R))[1],
+            b"ZoneGroupState",
+        )),
+    ),
+}
+
+
+# ── measurement ─────────────────────────────────────────
+def measure(fn, calls):
+    fn()                                    # warm caches / imports
+    t0 = time.process_time()
+    for _ in range(calls):
+        fn()
+    cpu = (time.process_time() - t0) / calls
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_us": round(cpu * 1e6, 2), "peak_kib": round(peak / 1024, 2)}
+
+
+def main(calls=2000):
+    for name, (soco_fn, hot_fn) in CASES.items():
+        assert soco_fn() == hot_fn(), name
+    results = {}
+    for name, (soco_fn, hot_fn) in CASES.items():
+        n = calls if name != "GetZoneGroupState" else max(1, calls // 20)
+        results[name] = {"soco": measure(soco_fn, n), "hot": measure(hot_fn, n)}
+    print(json.dumps({"calls": calls, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,198 @@
+"""
+bench_sonos_xml.py
+────────────────────────────────────────────────────────────
+Micro-benchmark: streaming (iterparse, elements cleared as read) vs a
+minimal full-tree parse (fromstring + iter) of a synthetic 32-zone
+ZoneGroupState and a 500-item favorites DIDL.  Both sides of each pair
+return exactly the same data.
+
+Reports best-of-N parse time and tracemalloc peak memory for each path.
+sonos_xml uses the tree for the topology (the stream was slower and saved
+little) and the stream for favorites (far lower peak, early exit).  If SoCo
+is installed its own DIDL parser is benchmarked as well.
+
+    python bench_sonos_xml.py [repeats]
+"""
+
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
+import io, json, sys, time, tracemalloc
+
+import sonos_xml
+
+ZONES     = 32
+FAVORITES = 500
+
+
+# ── synthetic documents ─────────────────────────────────
+def make_topology(zones=ZONES, per_group=2):
+    groups, n = [], 0
+    while n < zones:
+        members = []
+        size = min(per_group, zones - n)
+        coord = f"RINCON_48A6B82F{n:04X}01400"
+        for i in range(size):
+            uuid = f"RINCON_48A6B82F{n + i:04X}01400"
+            sats = "".join(
+                f'<Satellite UUID="{uuid}S{s}" Location="http://10.9.{s}.{n + i}'
+                f':1400/xml/device_description.xml" ZoneName="Room {n + i}" '
+                f'SoftwareVersion="79.1-56030" Invisible="1"/>'
+                for s in range(2)
+            )
+            members.append(
+                f'<ZoneGroupMember UUID="{uuid}" '
+                f'Location="http://10.6.2.{n + i}:1400/xml/device_description.xml" '
+                f'ZoneName="Room {n + i}" Icon="" Configuration="1" '
+                f'SoftwareVersion="79.1-56030" SWGen="2" MinCompatibleVersion="78.0-00000" '
+                f'LegacyCompatibleVersion="58.0-00000" BootSeq="42" TVConfigurationError="0" '
+                f'HdmiCecAvailable="0" WirelessMode="0" WirelessLeafOnly="0" '
+                f'ChannelFreq="2437" BehindWifiExtender="0" WifiEnabled="1" '
+                f'EthLink="1" Orientation="0" RoomCalibrationState="4" '
+                f'SecureRegState="3" VoiceConfigState="0" MicEnabled="0" '
+                f'AirPlayEnabled="1" IdleState="1" MoreInfo="">{sats}</ZoneGroupMember>'
+            )
+        groups.append(
+            f'<ZoneGroup Coordinator="{coord}" ID="{coord}:{n}">{"".join(members)}</ZoneGroup>'
+        )
+        n += size
+    return (
+        "<ZoneGroupState><ZoneGroups>" + "".join(groups) +
+        "</ZoneGroups><VanishedDevices></VanishedDevices></ZoneGroupState>"
+    )
+
+
+def make_favorites(count=FAVORITES):
+    items = []
+    for i in range(count):
+        res_md = escape(
+            '<DIDL-Lite xmlns:dc="http://purl.org/dc/elements/1.1/" '
+            'xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/" '
+            'xmlns:r="urn:schemas-rinconnetworks-com:metadata-1-0/" '
+            'xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/">'
+            f'<item id="100c2068station{i}" parentID="0" restricted="true">'
+            f'<dc:title>Station {i}</dc:title>'
+            '<upnp:class>object.item.audioItem.audioBroadcast</upnp:class>'
+            '<desc id="cdudn" nameSpace="urn:schemas-rinconnetworks-com:metadata-1-0/">'
+            'SA_RINCON9479_X_#Svc9479-0-Token</desc></item></DIDL-Lite>'
+        )
+        items.append(
+            f'<item id="FV:2/{i}" parentID="FV:2" restricted="false">'
+            f'<dc:title>Station {i}</dc:title>'
+            '<upnp:class>object.itemobject.item.sonos-favorite</upnp:class>'
+            f'<r:ordinal>{i}</r:ordinal>'
+            '<res protocolInfo="x-sonosapi-hls:*:application/x-mpegURL:*">'
+            f'x-sonosapi-hls:Api%3atune%3aliveAudio%3a{9000 + i}?sid=37&amp;flags=288&amp;sn=31</res>'
+            '<upnp:albumArtURI>https://cdn.example.invalid/art.png</upnp:albumArtURI>'
+            '<r:type>instantPlay</r:type>'
+            '<r:description>TuneIn Station</r:description>'
+            f'<r:resMD>{res_md}</r:resMD></item>'
+        )
+    return (
+        '<DIDL-Lite xmlns:dc="http://purl.org/dc/elements/1.1/" '
+        'xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/" '
+        'xmlns:r="urn:schemas-rinconnetworks-com:metadata-1-0/" '
+        'xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/">' +
+        "".join(items) + "</DIDL-Lite>"
+    )
+
+
+# ── alternatives ────────────────────────────────────────
+def stream_topology(xml):
+    """iterparse, elements cleared as read – same output as zone_group_map."""
+    groups, group, coord_uuid, depth = {}, None, None, 0
+    for event, el in ET.iterparse(io.BytesIO(xml.encode("utf-8")), events=("start", "end")):
+        tag = el.tag
+        if event == "start":
+            if tag == "ZoneGroup":
+                coord_uuid = el.get("Coordinator")
+                group = {"coordinator": "", "members": [], "devices": [], "ips": []}
+            elif tag == "ZoneGroupMember":
+                depth += 1
+            continue
+        if tag == "ZoneGroupMember":
+            depth -= 1
+            if group is not None and depth == 0:
+                ip  = sonos_xml.location_ip(el.get("Location", ""))
+                dev = {"uuid": el.get("UUID"), "ip": ip, "name": el.get("ZoneName", "")}
+                if dev["uuid"] == coord_uuid:
+                    group["coordinator"] = ip
+                group["ips"].append(ip)
+                group["devices"].append(dev)
+                if el.get("Invisible") != "1":
+                    group["members"].append(dev)
+            el.clear()
+        elif tag == "Satellite":
+            el.clear()
+        elif tag == "ZoneGroup":
+            if group and group["coordinator"]:
+                groups[group["coordinator"]] = group
+            group = None
+            el.clear()
+    return groups
+
+
+def tree_favorites(didl):
+    """fromstring + iter, (title, uri) per item like sonos_xml.iter_favorites."""
+    root = ET.fromstring(didl.encode("utf-8"))
+    out = []
+    for item in root.iter(sonos_xml._ITEM):
+        res = item.find(sonos_xml._RES)
+        out.append((item.findtext(sonos_xml._TITLE) or "",
+                    (res.text if res is not None else None) or ""))
+    return out
+
+
+def soco_favorites(didl):
+    from soco.data_structures_entry import from_didl_string
+    from_didl_string.cache_clear()    # lru_cached – time the parse, not the cache
+    return [(f.title, f.resources[0].uri) for f in from_didl_string(didl)]
+
+
+# ── measurement ─────────────────────────────────────────
+def measure(fn, doc, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(doc)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(doc)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": round(best * 1000, 3), "peak_kib": round(peak / 1024, 1)}
+
+
+def main(repeats=20):
+    topo = make_topology()
+    favs = make_favorites()
+
+    # sanity: both paths agree on what the scripts actually use
+    assert sonos_xml.zone_group_map(topo) == stream_topology(topo)
+    assert list(sonos_xml.iter_favorites(favs)) == tree_favorites(favs)
+
+    cases = {
+        "topology_tree"      : (sonos_xml.zone_group_map, topo),     # used
+        "topology_stream"    : (stream_topology, topo),
+        "favorites_tree"     : (tree_favorites, favs),
+        "favorites_stream"   : (lambda d: list(sonos_xml.iter_favorites(d)), favs),   # used
+        "favorite_find_first": (lambda d: sonos_xml.find_favorite(d, "Station 0"), favs),
+        "favorite_find_last" : (lambda d: sonos_xml.find_favorite(d, f"Station {FAVORITES - 1}"), favs),
+    }
+    try:
+        import soco.data_structures_entry  # noqa: F401
+        cases["favorites_soco"] = (soco_favorites, favs)
+    except ImportError:
+        pass
+
+    print(json.dumps({
+        "zones"          : ZONES,
+        "favorites"      : FAVORITES,
+        "topology_bytes" : len(topo),
+        "favorites_bytes": len(favs),
+        "repeats"        : repeats,
+        "results"        : {k: measure(fn, doc, repeats) for k, (fn, doc) in cases.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
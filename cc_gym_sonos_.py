@@ -32,9 +32,71 @@ from soco import SoCo, config
 from soco.exceptions import SoCoException
 import json, datetime, time
 
+try:
+    import sonos_xml           # streaming topology parser (optional)
+except ImportError:
+    sonos_xml = None
+
+try:
+    import sonos_hot           # precompiled SOAP for the hot actions
+except ImportError:
+    sonos_hot = None
+
+try:
+    import sonos_graph         # run independent steps concurrently
+except ImportError:
+    sonos_graph = None
+
+try:
+    import sonos_cassette      # record / replay SOAP traffic (env-driven)
+    sonos_cassette.install()
+except ImportError:
+    pass
+
+try:
+    import sonos_hedge         # hedged idempotent reads (--hedge)
+    hedger = sonos_hedge.Hedger()
+except ImportError:
+    hedger = None
+
+try:
+    import sonos_deadline      # whole-run budget (--deadline 1.5s)
+    deadline = sonos_deadline.Deadline.from_argv()
+except ImportError:
+    deadline = None
+
 config.REQUEST_TIMEOUT = 4     # keep iOS/Pythonista snappy
 
+ROOM_NAME = {ip: name for name, ip in ROOM_IP.items()}
+
 # ── HELPERS ─────────────────────────────────────────────
+def call(fn, *args):
+    """Network call, trimmed to the run deadline when one is set."""
+    return deadline.call(fn, *args) if deadline else fn(*args)
+
+
+def read(spk, fn, *args):
+    """Idempotent read – hedged against a slow speaker when enabled."""
+    if hedger:
+        return call(hedger.call, spk.ip_address, fn, *args)
+    return call(fn, *args)
+
+
+def transport_state(spk):
+    if sonos_hot:
+        return sonos_hot.transport_state(spk.ip_address)
+    return spk.get_current_transport_info()['current_transport_state']
+
+
+def phase(name):
+    if deadline:
+        deadline.phase(name)
+
+
+def out_of_time():
+    return bool(deadline and deadline.exhausted())
+
+
 def connect(ip):
     try:
         return SoCo(ip)
@@ -70,7 +132,18 @@ def safe_unjoin(spk):
         pass
 
 
+def group_info(spk, groups=None):
+    """(coordinator IP, member count) – streamed topology when available."""
+    if groups:
+        g = sonos_xml.group_of(groups, spk.ip_address)
+        if g:
+            return g["coordinator"], len(g["ips"])
+    grp = spk.group
+    return grp.coordinator.ip_address, len(grp.members)
+
+
 # ── STEP 1: CONNECT ─────────────────────────────────────
+phase("discovery")
 gym   = connect(GYM_IP)
 house = connect(HOUSE_IP)
 
@@ -79,62 +152,136 @@ if not house and not gym:
 
 
 # ── STEP 2: DETERMINE COORDINATOR & GROUPING ────────────
-coord = None
-
-if house:
-    coord = house                           # House preferred
-    if gym:
-        if gym.group.coordinator.ip_address != HOUSE_IP:
-            if len(gym.group.members) > 1:
-                safe_unjoin(gym)
-            try:
-                gym.join(house)
-            except SoCoException:
-                pass
-else:                                       # House offline
-    coord = gym
-    if gym and len(gym.group.members) > 1:
-        safe_unjoin(gym)
-
-if not coord:
-    raise SystemExit("Coordinator could not be determined.")
+coord  = house or gym                       # House preferred
+status = {}                                 # room → succeeded / skipped / pending
+coord_room = ROOM_NAME[coord.ip_address]
+
+
+def read_topology():
+    """One topology read for both speakers."""
+    if not sonos_xml:
+        return None
+    try:
+        return read(coord, sonos_xml.fetch_zone_groups, coord)
+    except Exception:
+        return None
+
+
+def house_leads(groups):
+    """House already coordinates its own group (False when unsure)."""
+    if not house or not groups:
+        return False
+    g = sonos_xml.group_of(groups, HOUSE_IP)
+    return bool(g) and g["coordinator"] == HOUSE_IP
+
+
+def step_regroup(r):
+    try:
+        if house:
+            if gym:
+                gym_coord, gym_size = call(group_info, gym, topology)
+                if gym_coord != HOUSE_IP:
+                    if gym_size > 1:
+                        call(safe_unjoin, gym)
+                    try:
+                        call(gym.join, house)
+                    except SoCoException:
+                        pass
+        elif gym and call(group_info, gym, topology)[1] > 1:   # House offline
+            call(safe_unjoin, gym)
+    except SoCoException:
+        if not out_of_time():
+            raise
+        status["Sonos-Gym"] = "pending"     # regrouping cut short
 
 
 # ── STEP 3: TOGGLE LOGIC ────────────────────────────────
-try:
-    state = coord.get_current_transport_info()['current_transport_state']
-except SoCoException:
-    raise SystemExit("Unable to read transport state.")
+def step_state(r):
+    try:
+        return read(coord, transport_state, coord)
+    except SoCoException:
+        if not out_of_time():
+            raise SystemExit("Unable to read transport state.")
+        return None
 
 def ensure_station_if_needed():
     if queue_empty(coord):
         play_station(coord)
 
-try:
+def toggle(state):
     if state == "PLAYING":
-        coord.pause();  action = "pause"
+        coord.pause();  return "pause"
 
     elif state == "PAUSED_PLAYBACK":
         ensure_station_if_needed()
-        coord.play();   action = "play"
+        coord.play();   return "play"
 
     else:                               # STOPPED / NO_MEDIA_PRESENT etc.
         ensure_station_if_needed()
-        coord.play();   action = "play"
+        coord.play();   return "play"
 
-except SoCoException as e:
-    raise SystemExit(f"Playback error: {e}")
+def step_toggle(r):
+    if r["state"] is None:              # out of time before we knew the state
+        status[coord_room] = "pending"
+        return "none"
+    try:
+        action = call(toggle, r["state"])
+        status[coord_room] = "succeeded"
+        return action
+    except SoCoException as e:
+        if not out_of_time():
+            raise SystemExit(f"Playback error: {e}")
+        status[coord_room] = "pending"
+        return "none"
+
+
+# Only when House already leads its group can joining Gym to it overlap
+# reading and toggling House.  Otherwise – House a member of Gym's group,
+# House offline, topology unknown – regroup first, as the plain script does.
+topology = read_topology()
+overlap  = house_leads(topology)
+STEPS = [
+    ("regroup",  step_regroup,  ()),
+    ("state",    step_state,    () if overlap else ("regroup",)),
+    ("toggle",   step_toggle,   ("state",) if overlap else ("state", "regroup")),
+]
+
+phase("action")                         # steps overlap: one shared phase
+flow = None
+if sonos_graph:
+    flow = sonos_graph.Graph(STEPS)
+    results = flow.run()
+else:
+    results = {}
+    for name, fn, _ in STEPS: results[name] = fn(results)
+action = results["toggle"]
 
 
 # ── STEP 4: SUMMARY OUTPUT ──────────────────────────────
+coord_name = coord_room
 try:
-    group_list = [m.player_name for m in coord.group.members]
+    coord_name = call(lambda: coord.player_name)
+    group_list = call(lambda: [m.player_name for m in coord.group.members])
 except SoCoException:
-    group_list = [coord.player_name]
+    group_list = [coord_name]
 
-print(json.dumps({
+result = {
     "timestamp"   : datetime.datetime.now().isoformat(timespec="seconds"),
     "action"      : action.upper(),
-    "coordinator" : coord.player_name,
+    "coordinator" : coord_name,
     "group"       : group_list,
-}, indent=2))
+}
+if flow:
+    result["graph"] = flow.summary()
+if hedger and hedger.enabled:
+    result["hedge"] = hedger.summary()
+if deadline and deadline.limited:
+    rooms = {"succeeded": [], "skipped": [], "pending": []}
+    for name, ip in ROOM_IP.items():
+        if name not in status:          # offline, or regrouped without issue
+            offline = (gym if ip == GYM_IP else house) is None
+            status[name] = "skipped" if offline else "succeeded"
+        rooms[status[name]].append(name)
+    result["rooms"]    = rooms
+    result["deadline"] = deadline.summary()
+print(json.dumps(result, indent=2))
@@ -0,0 +1,253 @@
+"""
+sonos_cassette.py  ·  record / replay SOAP traffic
+────────────────────────────────────────────────────────────
+Captures every HTTP exchange SoCo makes (SOAP actions, device descriptions)
+together with its latency, and serves them back later without a network.
+
+  Record a real run:
+      python sonos_cassette.py record  603G.json 603G_sonos.py
+  Replay it offline (latency × scale, default 1.0):
+      python sonos_cassette.py replay  603G.json [--scale 0.5] 603G_sonos.py
+  Regression check – exit 1 on extra round trips or a slower run:
+      python sonos_cassette.py check   603G.json [--tolerance 0.2] 603G_sonos.py
+
+Scripts call install() at start-up; it does nothing unless SONOS_CASSETTE
+(file) and SONOS_CASSETTE_MODE (record | replay) are set, so Shortcuts runs
+are untouched.  Replay patches requests.Session.send in-process, so the
+"stand-in" speaker is the cassette itself – no sockets are opened.
+"""
+
+from collections import deque
+import atexit, datetime, json, os, runpy, sys, threading, time
+
+ENV_FILE  = "SONOS_CASSETTE"
+ENV_MODE  = "SONOS_CASSETTE_MODE"
+ENV_SCALE = "SONOS_CASSETTE_SCALE"
+
+_state = {}
+_lock  = threading.Lock()
+
+
+# ── helpers ─────────────────────────────────────────────
+def _now_ms(t0):
+    return round((time.perf_counter() - t0) * 1000, 2)
+
+
+def _start():
+    # the clock starts at the first request, so import / start-up time
+    # (which differs between env-driven and CLI runs) is not counted
+    with _lock:
+        if _state["t0"] is None:
+            _state["t0"] = time.perf_counter()
+
+
+def _wall_ms():
+    return _now_ms(_state["t0"]) if _state["t0"] is not None else 0.0
+
+
+def _body(prep):
+    body = prep.body or ""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    return body
+
+
+def _key(prep):
+    return (prep.method, prep.url, prep.headers.get("SOAPACTION", ""), _body(prep))
+
+
+def _loose_key(prep):
+    return _key(prep)[:3]
+
+
+def _log(msg):
+    print(f"# cassette: {msg}", file=sys.stderr)
+
+
+# ── record ──────────────────────────────────────────────
+def _record_send(orig):
+    def send(self, request, **kw):
+        _start()
+        t0 = time.perf_counter()
+        entry = {
+            "t_ms"  : _now_ms(_state["t0"]),
+            "method": request.method,
+            "url"   : request.url,
+            "action": request.headers.get("SOAPACTION", ""),
+            "body"  : _body(request),
+        }
+        try:
+            resp = orig(self, request, **kw)
+        except Exception as e:
+            entry.update(elapsed_ms=_now_ms(t0),
+                         error=type(e).__name__, message=str(e))
+            with _lock:
+                _state["exchanges"].append(entry)
+            raise
+        entry.update(
+            elapsed_ms=_now_ms(t0),
+            status    =resp.status_code,
+            headers   ={"Content-Type": resp.headers.get("Content-Type", "")},
+            text      =resp.text,
+        )
+        with _lock:
+            _state["exchanges"].append(entry)
+        return resp
+    return send
+
+
+def _save():
+    tape = {
+        "recorded" : datetime.datetime.now().isoformat(timespec="seconds"),
+        "script"   : os.path.basename(sys.argv[0]),
+        "wall_ms"  : _wall_ms(),
+        "exchanges": _state["exchanges"],
+    }
+    with open(_state["path"], "w") as f:
+        json.dump(tape, f, indent=1)
+    _log(f"recorded {len(tape['exchanges'])} exchanges "
+         f"in {tape['wall_ms']} ms → {_state['path']}")
+
+
+# ── replay ──────────────────────────────────────────────
+def _response(entry, request):
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+    resp = Response()
+    resp.status_code = entry["status"]
+    resp.headers     = CaseInsensitiveDict(entry.get("headers", {}))
+    resp._content    = entry["text"].encode("utf-8")
+    resp.encoding    = "utf-8"
+    resp.url         = request.url
+    resp.request     = request
+    resp.elapsed     = datetime.timedelta(milliseconds=entry["elapsed_ms"])
+    return resp
+
+
+def _replay_send():
+    import requests.exceptions as rex
+
+    def send(self, request, **kw):
+        _start()
+        with _lock:
+            _state["calls"] += 1
+            q = _state["exact"].get(_key(request))
+            if not q:
+                q = _state["loose"].get(_loose_key(request))
+                _state["loose_hits"] += bool(q)
+            entry = q.popleft() if q and len(q) > 1 else (q[0] if q else None)
+        if entry is None:
+            with _lock:
+                _state["misses"].append(f"{request.method} {request.url} "
+                                        f"{request.headers.get('SOAPACTION', '')}")
+            raise rex.ConnectionError(f"not in cassette: {request.url}")
+
+        delay   = entry["elapsed_ms"] / 1000 * _state["scale"]
+        timeout = kw.get("timeout")
+        if isinstance(timeout, tuple):
+            timeout = timeout[-1]
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise rex.ReadTimeout(f"replayed latency {delay:.2f}s > timeout {timeout}s")
+        time.sleep(delay)
+
+        if "error" in entry:
+            raise getattr(rex, entry["error"], rex.ConnectionError)(entry["message"])
+        return _response(entry, request)
+    return send
+
+
+def _report():
+    rep = replay_report()
+    _log(f"replayed {rep['round_trips']}/{rep['recorded_round_trips']} round trips, "
+         f"{rep['wall_ms']} ms (recorded {rep['recorded_wall_ms']} ms × {rep['scale']})")
+    for miss in rep["misses"]:
+        _log(f"miss: {miss}")
+
+
+def replay_report():
+    """Round trips / wall time of this replay next to the recorded run."""
+    return {
+        "round_trips"         : _state["calls"],
+        "recorded_round_trips": len(_state["tape"]["exchanges"]),
+        "loose_matches"       : _state["loose_hits"],
+        "misses"              : list(_state["misses"]),
+        "wall_ms"             : _wall_ms(),
+        "recorded_wall_ms"    : _state["tape"]["wall_ms"],
+        "scale"               : _state["scale"],
+    }
+
+
+# ── public API ──────────────────────────────────────────
+def install(path=None, mode=None, scale=None):
+    """Patch requests for record / replay.  No-op when not configured."""
+    path  = path  or os.environ.get(ENV_FILE)
+    mode  = mode  or os.environ.get(ENV_MODE)
+    if _state or not path or mode not in ("record", "replay"):
+        return None
+    import requests
+
+    _state.update(path=path, mode=mode, t0=None)
+    if mode == "record":
+        _state["exchanges"] = []
+        requests.Session.send = _record_send(requests.Session.send)
+        atexit.register(_save)
+    else:
+        with open(path) as f:
+            tape = json.load(f)
+        exact, loose = {}, {}
+        for e in tape["exchanges"]:
+            k = (e["method"], e["url"], e["action"], e["body"])
+            exact.setdefault(k, deque()).append(e)
+            loose.setdefault(k[:3], deque()).append(e)
+        _state.update(
+            tape=tape, exact=exact, loose=loose, calls=0, loose_hits=0, misses=[],
+            scale=float(scale if scale is not None else os.environ.get(ENV_SCALE, 1.0)),
+        )
+        requests.Session.send = _replay_send()
+        atexit.register(_report)
+    return mode
+
+
+def main(argv):
+    usage = ("usage: sonos_cassette.py record|replay|check CASSETTE "
+             "[--scale X] [--tolerance X] SCRIPT [script args…]")
+    if len(argv) < 3 or argv[0] not in ("record", "replay", "check"):
+        raise SystemExit(usage)
+    cmd, path, rest = argv[0], argv[1], argv[2:]
+    opts = {}
+    while len(rest) > 2 and rest[0].startswith("--"):
+        opts[rest[0]], rest = rest[1], rest[2:]
+    if not rest:
+        raise SystemExit(usage)
+    scale     = float(opts.get("--scale", 1.0))
+    tolerance = float(opts.get("--tolerance", 0.2))
+
+    install(path, "record" if cmd == "record" else "replay", scale)
+    script   = rest[0]
+    sys.argv = rest
+    code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        code = e.code
+
+    if cmd == "check":
+        rep = replay_report()
+        problems = []
+        if rep["round_trips"] > rep["recorded_round_trips"]:
+            problems.append(f"{rep['round_trips'] - rep['recorded_round_trips']} extra round trips")
+        if rep["misses"]:
+            problems.append(f"{len(rep['misses'])} requests not in cassette")
+        budget = rep["recorded_wall_ms"] * scale * (1 + tolerance)
+        if rep["wall_ms"] > budget:
+            problems.append(f"{rep['wall_ms']} ms > {round(budget, 1)} ms budget")
+        print(json.dumps({"ok": not problems, "problems": problems, **rep}, indent=2),
+              file=sys.stderr)
+        raise SystemExit(1 if problems else 0)
+    raise SystemExit(code)
+
+
+if __name__ == "__main__":
+    import sonos_cassette            # share state with the scripts' own import
+    sonos_cassette.main(sys.argv[1:])
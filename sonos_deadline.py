@@ -0,0 +1,157 @@
+"""
+sonos_deadline.py  ·  whole-run deadline split across phases
+────────────────────────────────────────────────────────────
+Shortcuts wants an answer in ~2 s, but config.REQUEST_TIMEOUT is per call
+and the scripts make several calls in a row.  A Deadline holds one budget
+for the whole run, hands each phase a share of what is left, and trims
+config.REQUEST_TIMEOUT before every call so no call can outlive its phase.
+
+  Enable:   --deadline 1.5s   (also 1500ms, 2)   or   SONOS_DEADLINE=1.5s
+
+Phases unused time rolls forward: a phase gets
+    remaining × weight / (sum of weights of this and later phases).
+
+A call that is not sent because the phase is spent, or that is still in
+flight when the phase ends, raises Expired.  Expired subclasses
+SoCoException so the scripts' existing handlers treat it as a failed step.
+"""
+
+import os, sys, threading, time
+
+try:
+    from soco import config
+    from soco.exceptions import SoCoException as _Base
+except ImportError:                   # lets the module load without SoCo
+    config, _Base = None, Exception
+
+# "fire" runs first only in optimistic toggles (sonos_fleet); otherwise unused
+PHASES = (("fire", 0.25), ("discovery", 0.35), ("probe", 0.25), ("action", 0.40))
+MIN_CALL_TIMEOUT = 0.05               # s – below this, don't bother sending
+
+
+class Expired(_Base):
+    """The run (or current phase) deadline was reached."""
+
+
+def parse(text):
+    """'1.5s' / '1500ms' / '2' → seconds (float)."""
+    text = text.strip().lower()
+    if text.endswith("ms"):
+        return float(text[:-2]) / 1000
+    if text.endswith("s"):
+        return float(text[:-1])
+    return float(text)
+
+
+class Deadline:
+    """Run budget; unlimited (pass-through) when total is None."""
+
+    def __init__(self, total=None, phases=PHASES):
+        self.total   = total
+        self.start   = time.monotonic()
+        self.weights = dict(phases)
+        self.order   = [name for name, _ in phases]
+        self.base    = None           # config.REQUEST_TIMEOUT, read on first call
+        self.current = None
+        self._phase_start = self.start
+        self.phase_end = None
+        self.spent   = {}             # phase → seconds actually used
+        self.hits    = []             # phases whose budget ran out
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        argv = sys.argv if argv is None else argv
+        value = os.environ.get("SONOS_DEADLINE")
+        if "--deadline" in argv:
+            i = argv.index("--deadline")
+            value = argv[i + 1] if i + 1 < len(argv) else value
+        return cls(parse(value) if value else None)
+
+    @property
+    def limited(self):
+        return self.total is not None
+
+    # ·· budget ······································
+    def remaining(self):
+        if not self.limited:
+            return float("inf")
+        return self.total - (time.monotonic() - self.start)
+
+    def exhausted(self):
+        """Current phase (or the whole run) has no time left for a call."""
+        return self.phase_remaining() < MIN_CALL_TIMEOUT
+
+    def _expire(self):
+        if self.current not in self.hits:
+            self.hits.append(self.current)
+        return Expired(f"deadline reached in {self.current} phase")
+
+    def phase(self, name):
+        """Close the current phase and give `name` its share of what's left."""
+        now = time.monotonic()
+        if self.current:
+            self.spent[self.current] = now - self._phase_start
+        self.current, self._phase_start = name, now
+        if not self.limited:
+            return
+        later = self.order[self.order.index(name):] if name in self.order else [name]
+        share = self.weights.get(name, 1.0) / sum(self.weights.get(p, 1.0) for p in later)
+        self.phase_end = now + max(0.0, self.remaining()) * share
+
+    def phase_remaining(self):
+        if not self.limited:
+            return float("inf")
+        end = self.phase_end if self.phase_end is not None else self.start + self.total
+        return min(end - time.monotonic(), self.remaining())
+
+    # ·· calls ·······································
+    def call(self, fn, *args, **kwargs):
+        """
+        fn(*args) with config.REQUEST_TIMEOUT trimmed to the phase budget.
+
+        SoCo methods can make several requests (play() first checks the
+        group), so fn runs on a daemon thread and is abandoned – left in
+        flight, reported as pending – once the phase budget is gone.
+        """
+        if not self.limited:
+            return fn(*args, **kwargs)
+        left = self.phase_remaining()
+        if left < MIN_CALL_TIMEOUT:
+            raise self._expire()
+        if config:
+            # SoCo reads this at send time.  It is deliberately not restored,
+            # so SoCo's own follow-up calls inside fn stay trimmed as well.
+            if self.base is None:
+                self.base = config.REQUEST_TIMEOUT
+            config.REQUEST_TIMEOUT = min(self.base, left)
+
+        box = {}
+
+        def run():
+            try:
+                box["result"] = fn(*args, **kwargs)
+            except BaseException as e:
+                box["error"] = e
+
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        t.join(left)
+        if t.is_alive():
+            raise self._expire()
+        err = box.get("error")
+        if err is None:
+            return box["result"]
+        if isinstance(err, OSError) and self.exhausted():   # requests' Timeout
+            raise self._expire() from err
+        raise err
+
+    # ·· reporting ···································
+    def summary(self):
+        if self.current and self.current not in self.spent:
+            self.spent[self.current] = time.monotonic() - self._phase_start
+        return {
+            "budget_ms" : round(self.total * 1000) if self.limited else None,
+            "elapsed_ms": round((time.monotonic() - self.start) * 1000),
+            "expired_in": self.hits,
+            "phases_ms" : {p: round(s * 1000) for p, s in self.spent.items()},
+        }
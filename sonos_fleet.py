@@ -0,0 +1,94 @@
+"""
+sonos_fleet.py  ·  last-known fleet state for optimistic toggles
+────────────────────────────────────────────────────────────
+A toggle_all run can't send anything until discovery and the any_playing
+probe are done.  Each run records, per site, which coordinators it found
+and which it left playing.  With --optimistic the next run takes its
+decision from that record and fires Play / Pause at the remembered
+coordinators straight away – one round trip – then runs the usual
+discovery and probe as verification, and re-sends only to rooms whose
+state (or coordinator) turned out different.
+
+  Enable:   --optimistic on the command line, or SONOS_OPTIMISTIC=1
+  State:    $SONOS_STATE_DIR/fleet.json (default ~/.sonos)
+  Stale:    records older than SONOS_OPTIMISTIC_MAX_AGE s (default 5 min)
+            are ignored and the run probes first as before
+
+Verification also checks the decision.  Rooms the fire didn't reach still
+show the state they had before the run; if one of them is PLAYING after a
+Play guess, or the fire reached none and none is playing after a Pause
+guess, the fleet was changed from elsewhere (the Sonos app, another tap):
+the run flips the action and re-sends to every room not already there.
+"""
+
+import os, sys, time
+
+import sonos_state
+
+FLEET_FILE = sonos_state.path("fleet.json")
+MAX_AGE    = float(os.environ.get("SONOS_OPTIMISTIC_MAX_AGE", 300))
+
+# transport states that count as "the action took"
+SETTLED = {
+    "play" : {"PLAYING", "TRANSITIONING"},
+    "pause": {"PAUSED_PLAYBACK", "STOPPED", "NO_MEDIA_PRESENT"},
+}
+
+
+def enabled():
+    return "--optimistic" in sys.argv or os.environ.get("SONOS_OPTIMISTIC") == "1"
+
+
+def settled(action, state):
+    return state in SETTLED[action]
+
+
+def decide(action, untouched, fired_any):
+    """
+    Action the plain toggle would have taken, from the pre-run states of
+    rooms the fire didn't reach ({ip: state}).  Falls back to action when
+    those rooms can't tell.
+    """
+    if any(st == "PLAYING" for st in untouched.values()):
+        return "pause"
+    if not fired_any and untouched:
+        return "play"
+    return action
+
+
+class Fleet:
+    """One site's record; guess() is None unless enabled and fresh."""
+
+    def __init__(self, site, enable=None, path=FLEET_FILE):
+        self.site    = site
+        self.path    = path
+        self.enabled = enabled() if enable is None else enable
+        self.last    = sonos_state.load(path).get(site) or None
+
+    def age(self):
+        return time.time() - self.last["ts"] if self.last else None
+
+    def guess(self):
+        """{"action", "coordinators": {ip: name}, "age_s"} from the last run, or None."""
+        if not self.enabled or not self.last or not self.last.get("coordinators"):
+            return None
+        if self.age() > MAX_AGE:
+            return None
+        return {
+            "action"      : "pause" if self.last.get("playing") else "play",
+            "coordinators": dict(self.last["coordinators"]),
+            "age_s"       : round(self.age()),
+        }
+
+    def record(self, coordinators, playing):
+        """coordinators: {ip: name}; playing: ips left playing by this run."""
+        entry = {
+            "ts"          : round(time.time(), 1),
+            "coordinators": coordinators,
+            "playing"     : sorted(playing),
+        }
+        try:
+            sonos_state.update(self.path, lambda data: data.__setitem__(self.site, entry),
+                               indent=1)
+        except OSError:
+            pass
@@ -0,0 +1,96 @@
+"""
+sonos_graph.py  ·  tiny dependency-graph runner for network steps
+────────────────────────────────────────────────────────────
+CC_Sonos.py and cc_gym_sonos_.py used to run strictly in order even where
+steps don't depend on each other (reading House's transport state doesn't
+need the Gym unjoin to finish).  A script lists its steps as
+
+    STEPS = [(name, fn, deps), …]        # fn(results) → value
+
+and Graph(STEPS).run() starts every step as soon as its deps are done, each
+on its own thread.  A step whose dep failed is not run; once everything has
+settled, run() re-raises the first error in list order – the one a plain
+in-order loop would have hit – so a script without this module can run the
+same list with
+
+    results = {}
+    for name, fn, _ in STEPS: results[name] = fn(results)
+
+summary() reports the wall time, the critical path (longest chain of step
+durations) and the sequential baseline (sum of all step durations).
+"""
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import time
+
+
+class StepSkipped(Exception):
+    """A dependency of this step failed, so it never ran."""
+
+
+class Graph:
+    def __init__(self, steps):
+        self.steps   = {name: (fn, tuple(deps)) for name, fn, deps in steps}
+        self.order   = [name for name, _, _ in steps]
+        self.results = {}
+        self.errors  = {}             # name → exception (or StepSkipped)
+        self.times   = {}             # name → (start, end) offsets in s
+        self.wall    = 0.0
+        for name, (_, deps) in self.steps.items():
+            missing = [d for d in deps if d not in self.steps]
+            if missing:
+                raise ValueError(f"{name}: unknown deps {missing}")
+
+    def _timed(self, name, t0):
+        fn, _ = self.steps[name]
+        start = time.perf_counter() - t0
+        try:
+            return fn(self.results)
+        finally:
+            self.times[name] = (start, time.perf_counter() - t0)
+
+    def run(self):
+        """Run the graph; returns results.  All step errors land in .errors."""
+        t0      = time.perf_counter()
+        pending = list(self.order)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(self.order))) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.steps[name][1]
+                    if any(d in self.errors for d in deps):
+                        self.errors[name] = StepSkipped(name)
+                        pending.remove(name)
+                    elif all(d in self.results for d in deps):
+                        running[pool.submit(self._timed, name, t0)] = name
+                        pending.remove(name)
+                if not running:
+                    if pending:       # only reachable through a dependency cycle
+                        raise ValueError(f"dependency cycle among {pending}")
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    try:
+                        self.results[name] = fut.result()
+                    except BaseException as e:      # incl. a step's SystemExit
+                        self.errors[name] = e
+        self.wall = time.perf_counter() - t0
+        for name in self.order:
+            err = self.errors.get(name)
+            if err is not None and not isinstance(err, StepSkipped):
+                raise err
+        return self.results
+
+    def summary(self):
+        dur = {n: end - start for n, (start, end) in self.times.items()}
+        path = {}
+        for name in self.order:           # list order is a valid topo order
+            deps = self.steps[name][1]
+            path[name] = dur.get(name, 0.0) + max((path[d] for d in deps), default=0.0)
+        return {
+            "wall_ms"         : round(self.wall * 1000, 1),
+            "critical_path_ms": round(max(path.values(), default=0.0) * 1000, 1),
+            "sequential_ms"   : round(sum(dur.values()) * 1000, 1),
+            "steps_ms"        : {n: round(d * 1000, 1) for n, d in dur.items()},
+        }
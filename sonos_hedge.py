@@ -0,0 +1,155 @@
+"""
+sonos_hedge.py  ·  hedged idempotent reads
+────────────────────────────────────────────────────────────
+One slow Port sets the tap latency for the whole toggle.  For *idempotent*
+reads only (GetTransportInfo, GetPositionInfo, GetZoneGroupState) a Hedger
+can fire a second identical request once the first has been outstanding
+longer than that speaker's observed p95, and take whichever answers first.
+
+  Enable:   --hedge on the command line, or SONOS_HEDGE=1
+  History:  per-IP latency samples in $SONOS_STATE_DIR/latency.json
+            (default ~/.sonos), so p95 survives between short runs.
+
+Never hedge Play / Pause / SetVolume etc. – those are not safe to repeat.
+"""
+
+import atexit, os, sys, threading, time
+
+import sonos_state
+
+LATENCY_FILE  = sonos_state.path("latency.json")
+
+SAMPLES       = 50        # latency samples kept per speaker
+MIN_SAMPLES   = 5         # below this, use DEFAULT_DELAY
+DEFAULT_DELAY = 0.5       # s – hedge delay before we know the speaker
+MIN_DELAY     = 0.02      # s – never hedge sooner than this
+MAX_RATE      = 0.25      # hedge at most this fraction of calls
+
+
+def enabled():
+    return "--hedge" in sys.argv or os.environ.get("SONOS_HEDGE") == "1"
+
+
+# ── helpers ─────────────────────────────────────────────
+def _p95(samples):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(len(s) * 0.95))]
+
+
+class _Attempt:
+    __slots__ = ("start", "elapsed", "result", "error")
+
+    def __init__(self):
+        self.start, self.elapsed = time.perf_counter(), None
+        self.result = self.error = None
+
+
+# ── hedger ──────────────────────────────────────────────
+class Hedger:
+    """Wraps idempotent reads; passes straight through when disabled."""
+
+    def __init__(self, enable=None, path=LATENCY_FILE):
+        self.enabled = enabled() if enable is None else enable
+        self.path    = path
+        self.lock    = threading.Lock()
+        self.samples = {}         # ip → [seconds, …]
+        self.calls   = 0
+        self.hedged  = 0
+        self.wins    = []         # (primary _Attempt, t_win) where hedge won
+        if self.enabled:
+            self._load()
+            atexit.register(self._save)
+
+    # ·· history ·····································
+    def _load(self):
+        self.samples = {ip: list(v)[-SAMPLES:] for ip, v in sonos_state.load(self.path).items()
+                        if isinstance(v, list)}
+
+    def _save(self):
+        try:
+            sonos_state.update(self.path, lambda data: data.update(self.samples))
+        except OSError:
+            pass
+
+    def _record(self, ip, seconds):
+        with self.lock:
+            s = self.samples.setdefault(ip, [])
+            s.append(round(seconds, 4))
+            del s[:-SAMPLES]
+
+    def delay(self, ip):
+        """Hedge trigger for ip: its p95, or DEFAULT_DELAY without history."""
+        s = self.samples.get(ip, ())
+        if len(s) < MIN_SAMPLES:
+            return DEFAULT_DELAY
+        return max(MIN_DELAY, _p95(s))
+
+    # ·· calls ·······································
+    def _run(self, ip, att, done, fn, args, kwargs):
+        try:
+            att.result = fn(*args, **kwargs)
+        except Exception as e:
+            att.error = e
+        att.elapsed = time.perf_counter() - att.start
+        self._record(ip, att.elapsed)
+        done.set()
+
+    def _start(self, ip, done, fn, args, kwargs):
+        att = _Attempt()
+        threading.Thread(target=self._run, args=(ip, att, done, fn, args, kwargs),
+                         daemon=True).start()
+        return att
+
+    def call(self, ip, fn, *args, **kwargs):
+        """fn(*args, **kwargs) against speaker ip, hedged after its p95."""
+        with self.lock:
+            self.calls += 1
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        done    = threading.Event()
+        primary = self._start(ip, done, fn, args, kwargs)
+        if done.wait(self.delay(ip)) or self.hedged >= MAX_RATE * self.calls:
+            done.wait()
+            return self._outcome(primary)
+
+        with self.lock:
+            self.hedged += 1
+        second = self._start(ip, done, fn, args, kwargs)
+        while True:
+            done.wait()
+            done.clear()
+            finished = [a for a in (primary, second) if a.elapsed is not None]
+            ok = [a for a in finished if a.error is None]
+            if ok or len(finished) == 2:
+                break
+        winner = ok[0] if ok else primary
+        if winner is second:
+            with self.lock:
+                self.wins.append((primary, time.perf_counter() - primary.start))
+        return self._outcome(winner)
+
+    @staticmethod
+    def _outcome(att):
+        if att.error is not None:
+            raise att.error
+        return att.result
+
+    # ·· reporting ···································
+    def summary(self):
+        """Hedge rate and the tail latency it cut (lower bound if still pending)."""
+        now, saved, pending = time.perf_counter(), 0.0, 0
+        for primary, t_win in self.wins:
+            if primary.elapsed is None:
+                pending += 1
+                saved += (now - primary.start) - t_win
+            else:
+                saved += primary.elapsed - t_win
+        return {
+            "calls"     : self.calls,
+            "hedged"    : self.hedged,
+            "hedge_rate": round(self.hedged / self.calls, 3) if self.calls else 0.0,
+            "hedge_wins": len(self.wins),
+            "saved_ms"  : round(saved * 1000, 1),
+            "still_slow": pending,
+        }
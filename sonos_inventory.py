@@ -0,0 +1,291 @@
+"""
+sonos_inventory.py  ·  UID-keyed speaker inventory (SQLite)
+────────────────────────────────────────────────────────────
+Ties every device the site scripts touch to its UID (RINCON_<MAC>01400),
+room name, model and last-known IP, plus a reachability history.  The
+toggle scripts keep it current from the topology they already fetch, and
+resolve their ROOM_IP roster through it before touching the network, so a
+DHCP lease change does not break a site.
+
+  $SONOS_STATE_DIR/inventory.sqlite   (default ~/.sonos)
+
+  python sonos_inventory.py show   [SITE]       list devices
+  python sonos_inventory.py lookup UID|NAME|IP  one device + recent history
+  python sonos_inventory.py scan   IP [IP …]    topology + model / MAC
+                                                 from device descriptions
+Roster names such as "Sonos-48A6B82F697A" resolve straight to a UID from
+the MAC they contain; other names are learned the first time their IP is
+seen in a topology.
+"""
+
+import json, os, re, sqlite3, sys, time
+
+import sonos_state
+
+DB_PATH   = sonos_state.path("inventory.sqlite")
+HISTORY_DAYS = 30
+
+_MAC_NAME = re.compile(r"^Sonos-([0-9A-Fa-f]{12})$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    uid       TEXT PRIMARY KEY,
+    name      TEXT,
+    ip        TEXT,
+    mac       TEXT,
+    model     TEXT,
+    site      TEXT,
+    last_seen REAL
+);
+CREATE INDEX IF NOT EXISTS devices_ip   ON devices(ip);
+CREATE INDEX IF NOT EXISTS devices_name ON devices(name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS aliases (          -- roster label → uid, per site
+    site  TEXT NOT NULL,
+    alias TEXT NOT NULL COLLATE NOCASE,
+    uid   TEXT NOT NULL,
+    ip    TEXT,                               -- roster IP it was learned under
+    PRIMARY KEY (site, alias)
+);
+
+CREATE TABLE IF NOT EXISTS reachability (
+    uid        TEXT NOT NULL,
+    ts         REAL NOT NULL,
+    ok         INTEGER NOT NULL,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS reach_uid ON reachability(uid, ts);
+"""
+
+
+# ── helpers ─────────────────────────────────────────────
+def uid_mac(uid):
+    """'RINCON_48A6B82F697A01400' → '48:A6:B8:2F:69:7A' (or None)."""
+    m = re.match(r"^RINCON_([0-9A-Fa-f]{12})", uid or "")
+    if not m:
+        return None
+    h = m.group(1).upper()
+    return ":".join(h[i:i + 2] for i in range(0, 12, 2))
+
+
+def mac_uid(name):
+    """Roster label 'Sonos-48A6B82F697A' → 'RINCON_48A6B82F697A01400'."""
+    m = _MAC_NAME.match(name or "")
+    return f"RINCON_{m.group(1).upper()}01400" if m else None
+
+
+# ── inventory ───────────────────────────────────────────
+class Inventory:
+    def __init__(self, path=DB_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        cols = [r["name"] for r in self.db.execute("PRAGMA table_info(aliases)")]
+        if "ip" not in cols:                  # databases from before alias IPs
+            self.db.execute("ALTER TABLE aliases ADD COLUMN ip TEXT")
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    # ·· lookups ·····································
+    def by_uid(self, uid):
+        return self.db.execute("SELECT * FROM devices WHERE uid = ?", (uid,)).fetchone()
+
+    def by_ip(self, ip):
+        return self.db.execute(
+            "SELECT * FROM devices WHERE ip = ? ORDER BY last_seen DESC LIMIT 1", (ip,)
+        ).fetchone()
+
+    def by_name(self, name, site=None):
+        """
+        Roster alias, MAC-derived label, or Sonos room name.  Labels like
+        "Pete's Office" repeat across sites, so pass site when you have it.
+        """
+        uid = mac_uid(name)
+        if uid:
+            return self.by_uid(uid)
+        if site:
+            row = self.db.execute(
+                "SELECT d.* FROM aliases a JOIN devices d ON d.uid = a.uid "
+                "WHERE a.site = ? AND a.alias = ?", (site, name),
+            ).fetchone()
+            return row or self.db.execute(
+                "SELECT * FROM devices WHERE site = ? AND name = ? COLLATE NOCASE "
+                "ORDER BY last_seen DESC LIMIT 1", (site, name),
+            ).fetchone()
+        row = self.db.execute(
+            "SELECT d.* FROM aliases a JOIN devices d ON d.uid = a.uid "
+            "WHERE a.alias = ? LIMIT 1", (name,),
+        ).fetchone()
+        return row or self.db.execute(
+            "SELECT * FROM devices WHERE name = ? COLLATE NOCASE "
+            "ORDER BY last_seen DESC LIMIT 1", (name,),
+        ).fetchone()
+
+    def lookup(self, key):
+        return self.by_uid(key) or self.by_ip(key) or self.by_name(key)
+
+    def history(self, uid, limit=20):
+        return self.db.execute(
+            "SELECT ts, ok, latency_ms FROM reachability WHERE uid = ? "
+            "ORDER BY ts DESC LIMIT ?", (uid, limit)
+        ).fetchall()
+
+    # ·· updates ·····································
+    def observe(self, groups, site=None):
+        """Upsert every device from a sonos_xml.zone_group_map result."""
+        now = time.time()
+        rows = [
+            (d["uuid"], d["name"], d["ip"], uid_mac(d["uuid"]), site, now)
+            for g in groups.values() for d in g["devices"] if d["uuid"]
+        ]
+        with self.db:
+            # an IP now held by another device is no longer the old one's
+            self.db.executemany(
+                "UPDATE devices SET ip = NULL WHERE ip = ? AND uid != ?",
+                [(r[2], r[0]) for r in rows],
+            )
+            self.db.executemany(
+                """INSERT INTO devices (uid, name, ip, mac, site, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(uid) DO UPDATE SET
+                       name = excluded.name, ip = excluded.ip, mac = excluded.mac,
+                       site = COALESCE(excluded.site, devices.site),
+                       last_seen = excluded.last_seen""",
+                rows,
+            )
+
+    def set_details(self, uid, **fields):
+        cols = [c for c in ("model", "mac", "name") if fields.get(c)]
+        if cols:
+            with self.db:
+                self.db.execute(
+                    f"UPDATE devices SET {', '.join(c + ' = ?' for c in cols)} WHERE uid = ?",
+                    [fields[c] for c in cols] + [uid],
+                )
+
+    def seen(self, ip, ok, latency_ms=None):
+        """Append a reachability sample for whichever device holds ip."""
+        row = self.by_ip(ip)
+        if not row:
+            return
+        with self.db:
+            self.db.execute(
+                "INSERT INTO reachability (uid, ts, ok, latency_ms) VALUES (?, ?, ?, ?)",
+                (row["uid"], time.time(), int(bool(ok)), latency_ms),
+            )
+
+    def prune(self, days=HISTORY_DAYS):
+        with self.db:
+            self.db.execute("DELETE FROM reachability WHERE ts < ?",
+                            (time.time() - days * 86400,))
+
+    # ·· rosters ·····································
+    def resolve(self, room_ip, site=None):
+        """
+        ROOM_IP with each entry's IP replaced by its last-known IP.
+
+        A roster IP now held by another known device is usually a DHCP swap,
+        so the label keeps following its device.  The roster wins only when
+        it was edited – its IP differs from the one the alias was learned
+        under – or when the label's device has no known IP; a matching known
+        device then takes over the alias.
+        """
+        out, moved = {}, []
+        for name, ip in room_ip.items():
+            row  = self.by_name(name, site)
+            here = self.by_ip(ip)
+            if row and not mac_uid(name) and (here is None or here["uid"] != row["uid"]):
+                alias  = self._alias_row(site, name)
+                edited = alias is not None and alias["ip"] is not None and alias["ip"] != ip
+                if edited or not row["ip"]:
+                    row = here
+                    if here and site:
+                        moved.append((site, name, here["uid"], ip))
+            row = row or here
+            out[name] = row["ip"] if row and row["ip"] else ip
+        self._alias(moved)
+        return out
+
+    def learn(self, room_ip, site, roster=None):
+        """
+        Remember roster label → uid for entries whose IP we now know.
+        room_ip holds the resolved IPs; roster the ones the site script
+        lists (default: the same).
+        """
+        roster = roster or room_ip
+        pairs  = []
+        for name, ip in room_ip.items():
+            row = self.by_ip(ip)
+            if row:
+                pairs.append((site, name, row["uid"], roster.get(name, ip)))
+        self._alias(pairs)
+
+    def _alias_row(self, site, name):
+        if not site:
+            return None
+        return self.db.execute(
+            "SELECT * FROM aliases WHERE site = ? AND alias = ?", (site, name)
+        ).fetchone()
+
+    def _alias(self, rows):
+        with self.db:
+            self.db.executemany(
+                """INSERT INTO aliases (site, alias, uid, ip) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(site, alias) DO UPDATE SET
+                       uid = excluded.uid, ip = excluded.ip""",
+                rows,
+            )
+
+
+# ── CLI ─────────────────────────────────────────────────
+def _row(r):
+    return {k: r[k] for k in r.keys()} if r else None
+
+
+def scan(inv, ips):
+    """Topology from each IP, then model / MAC from device descriptions."""
+    from soco import SoCo
+    import sonos_xml
+    for ip in ips:
+        groups = sonos_xml.fetch_zone_groups(SoCo(ip))
+        inv.observe(groups)
+        for g in groups.values():
+            for d in g["devices"]:
+                try:
+                    info = SoCo(d["ip"]).get_speaker_info(refresh=True)
+                except Exception:
+                    info = None
+                if not info:
+                    continue
+                inv.set_details(d["uuid"], model=info.get("model_name"),
+                                mac=info.get("mac_address"))
+
+
+def main(argv):
+    inv = Inventory()
+    cmd, args = (argv[0], argv[1:]) if argv else ("show", [])
+    if cmd == "show":
+        q, p = "SELECT * FROM devices", ()
+        if args:
+            q, p = q + " WHERE site = ?", (args[0],)
+        out = [_row(r) for r in inv.db.execute(q + " ORDER BY site, name", p)]
+    elif cmd == "lookup" and args:
+        row = inv.lookup(args[0])
+        out = _row(row)
+        if row:
+            out["history"] = [_row(h) for h in inv.history(row["uid"])]
+    elif cmd == "scan" and args:
+        scan(inv, args)
+        out = {"devices": inv.db.execute("SELECT COUNT(*) FROM devices").fetchone()[0]}
+    else:
+        raise SystemExit(__doc__)
+    inv.close()
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,150 @@
+"""
+sonos_limit.py  ·  AIMD concurrency limit for per-site fan-out
+────────────────────────────────────────────────────────────
+The toggle_all scripts probe and command every coordinator in parallel.
+Firing a whole site at once can swamp the host's sockets and the speakers'
+small HTTP servers, so a Limiter caps how many calls are in flight and
+learns the cap per site:
+
+  • call succeeds near the site's best latency  → limit + 1/limit
+                                                  (≈ +1 per full window)
+  • call succeeds but slow (> LATENCY_FACTOR ×)  → limit held
+  • timeout / SoCoException / socket error      → limit × BACKOFF
+                                                  (once per window)
+
+Limits and latency baselines persist per site in
+$SONOS_STATE_DIR/limits.json (default ~/.sonos), so short runs keep what
+earlier ones learned.  SONOS_MAX_CONCURRENCY caps the limit (1 = one call
+at a time).  A deadline Expired is not treated as overload.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import atexit, os, threading, time
+
+import sonos_state
+
+try:
+    from sonos_deadline import Expired
+except ImportError:
+    Expired = ()
+
+LIMITS_FILE    = sonos_state.path("limits.json")
+
+INITIAL_LIMIT  = 4.0
+MIN_LIMIT      = 1.0
+MAX_LIMIT      = float(os.environ.get("SONOS_MAX_CONCURRENCY", 32))
+BACKOFF        = 0.5
+LATENCY_FACTOR = 2.0      # slower than best × this → don't grow
+SAMPLES        = 50
+
+
+class Limiter:
+    def __init__(self, site, path=LIMITS_FILE):
+        self.site     = site
+        self.path     = path
+        self.cond     = threading.Condition()
+        self.limit    = INITIAL_LIMIT
+        self.samples  = []        # recent successful latencies, s
+        self.inflight = 0
+        self.peak     = 0
+        self.calls    = 0
+        self.errors   = 0
+        self.busy     = 0.0       # wall time spent inside map()
+        self._backoff_at = 0.0
+        self._load()
+        self.start_limit = self.limit
+        atexit.register(self._save)
+
+    # ·· persistence ·································
+    def _load(self):
+        saved = sonos_state.load(self.path).get(self.site)
+        if isinstance(saved, dict):
+            try:
+                self.limit   = float(saved.get("limit", INITIAL_LIMIT))
+                self.samples = list(saved.get("samples", []))[-SAMPLES:]
+            except (TypeError, ValueError):
+                pass
+        self.limit = min(MAX_LIMIT, max(MIN_LIMIT, self.limit))
+
+    def _save(self):
+        entry = {"limit": round(self.limit, 2), "samples": self.samples}
+        try:
+            sonos_state.update(self.path, lambda data: data.__setitem__(self.site, entry))
+        except OSError:
+            pass
+
+    # ·· slots ·······································
+    def _acquire(self):
+        with self.cond:
+            while self.inflight >= int(self.limit):
+                self.cond.wait()
+            self.inflight += 1
+            self.peak = max(self.peak, self.inflight)
+            return time.monotonic()
+
+    def _release(self, started, error):
+        now = time.monotonic()
+        with self.cond:
+            self.inflight -= 1
+            self.calls += 1
+            if error is not None and not isinstance(error, Expired):
+                self.errors += 1
+                if started >= self._backoff_at:       # one cut per window
+                    self.limit = max(MIN_LIMIT, self.limit * BACKOFF)
+                    self._backoff_at = now
+            elif error is None:
+                latency = now - started
+                best = min(self.samples) if self.samples else latency
+                self.samples.append(round(latency, 4))
+                del self.samples[:-SAMPLES]
+                if latency <= best * LATENCY_FACTOR:
+                    self.limit = min(MAX_LIMIT, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+    # ·· fan-out ·····································
+    def map(self, fn, items, stop=None):
+        """
+        fn(item) for every item, at most `limit` at a time.  Returns
+        [(item, result, error)] in item order.  Once stop(result) is true,
+        items not yet started are dropped from the output.
+        """
+        items   = list(items)
+        out     = {}
+        stopped = threading.Event()
+
+        def run(i):
+            started = self._acquire()
+            if stopped.is_set():
+                self._release_unused()
+                return
+            result = error = None
+            try:
+                result = fn(items[i])
+            except Exception as e:
+                error = e
+            self._release(started, error)
+            out[i] = (items[i], result, error)
+            if error is None and stop and stop(result):
+                stopped.set()
+
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, min(len(items), int(MAX_LIMIT)))) as pool:
+            list(pool.map(run, range(len(items))))
+        self.busy += time.monotonic() - t0
+        return [out[i] for i in sorted(out)]
+
+    def _release_unused(self):
+        with self.cond:
+            self.inflight -= 1
+            self.cond.notify_all()
+
+    # ·· reporting ···································
+    def summary(self):
+        return {
+            "limit"           : int(self.limit),
+            "start_limit"     : int(self.start_limit),
+            "peak_inflight"   : self.peak,
+            "calls"           : self.calls,
+            "errors"          : self.errors,
+            "throughput_per_s": round(self.calls / self.busy, 1) if self.busy else 0.0,
+        }
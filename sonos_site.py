@@ -0,0 +1,448 @@
+"""
+sonos_site.py  ·  the toggle_all flow shared by every site script
+────────────────────────────────────────────────────────────
+Each <SITE>_sonos.py holds only its ROOM_IP roster (and an optional
+FALLBACK_URI) and calls
+
+    sonos_site.run(ROOM_IP, __file__, FALLBACK_URI)
+
+which toggles the whole site:
+
+  • If ANY coordinator is PLAYING → pause every group.
+  • If NONE are playing          → play every group that has media
+                                   (FALLBACK_URI for the rest, if set).
+
+and prints the JSON summary for Shortcuts.  The optional helpers next to
+this file (sonos_xml, sonos_hot, sonos_hedge, sonos_deadline, sonos_limit,
+sonos_fleet, sonos_inventory, sonos_cassette) switch themselves in when
+present; see README.md.
+"""
+
+import datetime, json, time
+
+from soco import SoCo, config
+from soco.exceptions import SoCoException
+
+try:
+    import sonos_xml              # streaming topology parser
+except ImportError:
+    sonos_xml = None
+
+try:
+    import sonos_hot              # precompiled SOAP for the hot actions
+except ImportError:
+    sonos_hot = None
+
+try:
+    import sonos_cassette         # record / replay SOAP traffic (env-driven)
+    sonos_cassette.install()
+except ImportError:
+    pass
+
+try:
+    import sonos_hedge            # hedged idempotent reads (--hedge)
+except ImportError:
+    sonos_hedge = None
+
+try:
+    import sonos_deadline         # whole-run budget (--deadline 1.5s)
+except ImportError:
+    sonos_deadline = None
+
+try:
+    import sonos_limit            # adaptive per-site concurrency (AIMD)
+except ImportError:
+    sonos_limit = None
+
+try:
+    import sonos_fleet            # last-known state for --optimistic toggles
+except ImportError:
+    sonos_fleet = None
+
+try:
+    import sonos_inventory        # UID-keyed device inventory (SQLite)
+except ImportError:
+    sonos_inventory = None
+
+from sonos_state import site_of
+
+REQUEST_TIMEOUT = 4               # keeps calls snappy on iOS
+
+# a speaker that refused or timed out – requests' errors are OSErrors
+FAILURES = (SoCoException, OSError)
+Expired  = sonos_deadline.Expired if sonos_deadline else ()   # → pending
+
+
+class SiteToggle:
+    """One toggle_all run for one site."""
+
+    def __init__(self, room_ip, script, fallback_uri=None):
+        self.site     = site_of(script)
+        self.fallback = fallback_uri
+        self.hedger   = sonos_hedge.Hedger() if sonos_hedge else None
+        self.deadline = sonos_deadline.Deadline.from_argv() if sonos_deadline else None
+        self.limiter  = sonos_limit.Limiter(self.site) if sonos_limit else None
+        self.fleet    = sonos_fleet.Fleet(self.site) if sonos_fleet else None
+        try:
+            self.inventory = sonos_inventory.Inventory() if sonos_inventory else None
+        except Exception:         # state dir unwritable
+            self.inventory = None
+
+        self.roster       = room_ip   # as written in the site script
+        if self.inventory:
+            room_ip = self.inventory.resolve(room_ip, self.site)   # follow DHCP churn
+        self.room_ip      = room_ip
+        self.room_name    = {ip: name for name, ip in room_ip.items()}
+        self.coordinators = {}    # ip → SoCo object
+        self.names        = {}    # ip → room name (from topology)
+        self.coord_of     = {}    # roster ip → its coordinator's ip
+        self.status       = {}    # coordinator ip → succeeded / skipped / pending
+        self.states       = {}    # coordinator ip → transport state seen
+        self.action       = None
+        self.guess        = None
+        self.flipped      = False  # optimistic guess contradicted by the probe
+        self.fire_ms      = None
+        self.media        = None
+        self.targets      = []
+        self.corrected    = []    # optimistic: rooms the correction pass took on
+        self.unresolved   = "skipped"
+
+    # ·· plumbing ····································
+    def call(self, fn, *args):
+        """Network call, trimmed to the run deadline when one is set."""
+        return self.deadline.call(fn, *args) if self.deadline else fn(*args)
+
+    def read(self, ip, fn, *args):
+        """Idempotent read – hedged against a slow speaker when enabled."""
+        if self.hedger:
+            return self.call(self.hedger.call, ip, fn, *args)
+        return self.call(fn, *args)
+
+    def phase(self, name):
+        if self.deadline:
+            self.deadline.phase(name)
+
+    def out_of_time(self):
+        """No time left in the current phase for another call."""
+        return bool(self.deadline and self.deadline.exhausted())
+
+    def label(self, ip):
+        return self.names.get(ip) or self.room_name.get(ip) or ip
+
+    def fan_out(self, fn, items, stop=None):
+        """[(item, fn(item), error)] – in parallel under the site's limit."""
+        if self.limiter:
+            return self.limiter.map(fn, items, stop)
+        out = []
+        for item in items:
+            try:
+                out.append((item, fn(item), None))
+            except Exception as e:
+                out.append((item, None, e))
+            if out[-1][2] is None and stop and stop(out[-1][1]):
+                break
+        return out
+
+    def settle(self, results):
+        """
+        Per-coordinator statuses from a fan_out of act / play_fallback.  A
+        speaker failure is classified here, after the limiter has counted it,
+        as pending (cut off by the deadline) or skipped; anything else is
+        re-raised.
+        """
+        for ip, st, err in results:
+            if isinstance(err, FAILURES):
+                print(f"# {self.label(ip)}: {err}")
+                st = "pending" if isinstance(err, Expired) else "skipped"
+            elif err is not None:
+                raise err
+            self.status[ip] = st
+
+    # ·· speaker calls ·······························
+    @staticmethod
+    def fetch_groups(ip):
+        """Topology via sonos_xml – precompiled request when available."""
+        if sonos_hot:
+            return sonos_xml.zone_group_map(sonos_hot.zone_group_state(ip))
+        return sonos_xml.fetch_zone_groups(SoCo(ip))
+
+    @staticmethod
+    def transport_state(ip, c):
+        if sonos_hot:
+            return sonos_hot.transport_state(ip)
+        return c.get_current_transport_info()['current_transport_state']
+
+    @staticmethod
+    def has_media(ip, c):
+        """A stream, or a queue with tracks – something Play can start."""
+        if sonos_hot:
+            return sonos_hot.has_media(ip)
+        info = c.avTransport.GetMediaInfo([("InstanceID", 0)])
+        uri  = info.get("CurrentURI", "")
+        return bool(uri) and (not uri.startswith("x-rincon-queue:") or info.get("NrTracks") != "0")
+
+    def send_action(self, ip, c, action):
+        """c.pause() / c.play(), or the precompiled equivalent."""
+        if sonos_hot:
+            return self.call(getattr(sonos_hot, action), ip)
+        return self.call(getattr(c, action))
+
+    def act(self, ip, action):
+        """Play / pause one coordinator → succeeded / pending; raises on failure."""
+        if self.out_of_time():
+            return "pending"
+        self.send_action(ip, self.coordinators.get(ip) or SoCo(ip), action)
+        return "succeeded"
+
+    def play_fallback(self, ip):
+        """fallback_uri on a coordinator that had nothing to play."""
+        if self.out_of_time():
+            return "pending"
+        self.call(self.coordinators[ip].play_uri, self.fallback)
+        return "succeeded"
+
+    def follow_moves(self):
+        """Re-resolve the roster after a topology read → IPs newly learned."""
+        room_ip = self.inventory.resolve(self.roster, self.site)
+        moved   = [ip for name, ip in room_ip.items() if ip != self.room_ip[name]]
+        if moved:
+            self.room_ip   = room_ip
+            self.room_name = {ip: name for name, ip in room_ip.items()}
+        return moved
+
+    # ·· steps ·······································
+    def fire(self):
+        """--optimistic: act on last run's coordinators before discovery."""
+        self.guess = self.fleet.guess() if self.fleet else None
+        if not self.guess:
+            return
+        self.phase("fire")
+        self.action = self.guess["action"]
+        self.names.update(self.guess["coordinators"])
+        t0 = time.perf_counter()
+        self.settle(self.fan_out(lambda ip: self.act(ip, self.action),
+                                 self.guess["coordinators"]))
+        self.fire_ms = round((time.perf_counter() - t0) * 1000, 1)
+
+    def discover(self):
+        """Unique coordinator list for the roster."""
+        self.phase("discovery")
+        inventory = self.inventory
+        if sonos_xml:
+            # one GetZoneGroupState per household instead of one per room
+            roster  = set(self.room_ip.values())
+            pending = list(self.room_ip.values())
+            while pending and not self.out_of_time():
+                seed = pending.pop(0)
+                t0   = time.perf_counter()
+                try:
+                    groups = self.read(seed, self.fetch_groups, seed)
+                except Exception as e:
+                    print(f"# Skipping {seed}: {e}")
+                    if inventory:
+                        inventory.seen(seed, False)
+                    continue
+                if inventory:
+                    inventory.observe(groups, self.site)
+                    inventory.seen(seed, True, round((time.perf_counter() - t0) * 1000, 1))
+                    moved = self.follow_moves()
+                    roster |= set(moved)
+                    pending += [ip for ip in moved if ip not in pending]
+                for coord_ip, g in groups.items():
+                    member_ips = set(g["ips"])
+                    pending = [ip for ip in pending if ip not in member_ips]
+                    if member_ips.isdisjoint(roster):
+                        continue
+                    self.coordinators[coord_ip] = SoCo(coord_ip)
+                    self.names[coord_ip] = next(
+                        (m["name"] for m in g["members"] if m["ip"] == coord_ip), None
+                    )
+                    self.coord_of.update((ip, coord_ip) for ip in member_ips & roster)
+        else:
+            for ip in self.room_ip.values():
+                if self.out_of_time():
+                    break
+                try:
+                    spk   = SoCo(ip)
+                    coord = self.call(lambda: spk.group.coordinator)
+                    self.coordinators[coord.ip_address] = coord
+                    self.coord_of[ip] = coord.ip_address
+                except SoCoException as e:
+                    print(f"# Skipping {ip}: {e}")
+
+        # rooms still unresolved: unreachable, or discovery ran out of time
+        self.unresolved = "pending" if self.out_of_time() else "skipped"
+        if not self.coordinators and not self.guess:
+            raise SystemExit("No reachable Sonos speakers!")
+
+    def probe(self):
+        """
+        any_playing across coordinators.  Out of time mid-probe → decide from
+        the rooms we did hear from; so does a room that fails to answer.
+        Optimistic runs read every coordinator instead: the state after the
+        fire.
+        """
+        self.phase("probe")
+        any_playing = False
+        probes = self.fan_out(
+            lambda ip: self.read(ip, self.transport_state, ip, self.coordinators[ip]),
+            self.coordinators, stop=None if self.guess else lambda state: state == "PLAYING",
+        )
+        for ip, state, err in probes:
+            if isinstance(err, FAILURES):     # unread: decide from the others
+                print(f"# {self.label(ip)}: {err}")
+                self.status.setdefault(ip, "pending" if isinstance(err, Expired) else "skipped")
+                continue
+            if err is not None:
+                raise err
+            self.states[ip] = state
+            if state == "PLAYING" and not self.guess:
+                any_playing = True
+                break
+        return any_playing
+
+    def choose_targets(self, any_playing):
+        if not self.guess:
+            self.action  = "pause" if any_playing else "play"
+            self.targets = list(self.coordinators)
+            return
+        # rooms the fire didn't reach still show their pre-run state
+        settled   = sonos_fleet.settled
+        fired     = {ip for ip, st in self.status.items() if st == "succeeded"}
+        untouched = {ip: st for ip, st in self.states.items() if ip not in fired}
+        action    = sonos_fleet.decide(self.action, untouched, bool(fired & set(self.states)))
+        if action != self.action:
+            print(f"# fleet changed since the last run: {self.action} → {action}")
+            self.action, self.flipped, self.status = action, True, {}
+
+        # every room the probe didn't show settled: missed by the fire (new
+        # coordinator, cut short), failed in it, or didn't take – unless the
+        # fire reached it and the probe couldn't say
+        self.status = {ip: st for ip, st in self.status.items() if ip in self.coordinators}
+        self.targets = []
+        for ip in self.coordinators:
+            if ip in self.states:
+                if settled(self.action, self.states[ip]):
+                    self.status[ip] = "succeeded"         # already where we want it
+                else:
+                    self.targets.append(ip)
+            elif self.status.get(ip) != "succeeded":
+                self.targets.append(ip)
+        # failed fires land here too; for Play the media check comes next
+        self.corrected = list(self.targets)
+
+    def filter_media(self):
+        """Drop coordinators with nothing to play from a Play pass."""
+        # PAUSED_PLAYBACK has media and NO_MEDIA_PRESENT has none; ask the rest
+        # that answered the probe – Play alone finds out about the others
+        t0     = time.perf_counter()
+        states = self.states
+        unsure = [ip for ip in self.targets if ip in states
+                  and states[ip] not in ("PAUSED_PLAYBACK", "NO_MEDIA_PRESENT")]
+        checks = self.fan_out(
+            lambda ip: self.read(ip, self.has_media, ip, self.coordinators[ip]), unsure)
+        empty  = [ip for ip in self.targets if states.get(ip) == "NO_MEDIA_PRESENT"]
+        empty += [ip for ip, present, err in checks if err is None and not present]
+        self.targets = [ip for ip in self.targets if ip not in empty]
+        self.media = {"checked": len(unsure), "cached": len(self.targets) + len(empty) - len(unsure),
+                      "check_ms": round((time.perf_counter() - t0) * 1000, 1)}
+        return empty
+
+    def act_all(self):
+        self.phase("action")
+        empty = self.filter_media() if self.action == "play" else []
+
+        call_ms = []              # per-call time of each Play / Pause sent
+
+        def timed_act(ip):
+            t0 = time.perf_counter()
+            try:
+                return self.act(ip, self.action)
+            finally:
+                call_ms.append((time.perf_counter() - t0) * 1000)
+
+        self.settle(self.fan_out(timed_act, self.targets))
+
+        if empty and self.fallback:
+            self.settle(self.fan_out(self.play_fallback, empty))
+        else:
+            self.status.update((ip, "skipped") for ip in empty)
+
+        if self.media is not None:
+            skipped  = 0 if self.fallback else len(empty)
+            per_call = sorted(call_ms)[len(call_ms) // 2] if call_ms else None
+            self.media.update({
+                "no_media"    : [self.label(ip) for ip in empty],
+                "fallback"    : bool(self.fallback and empty),
+                "play_skipped": skipped,
+                # one check per unsure room against one Play per empty room
+                "calls_saved" : skipped - self.media["checked"],
+                "saved_ms"    : round(skipped * per_call, 1) if per_call is not None else None,
+            })
+
+    def remember(self):
+        """Fleet state for the next --optimistic run, inventory upkeep."""
+        if self.fleet and self.coordinators:
+            if self.action == "play":
+                playing = [ip for ip, st in self.status.items() if st == "succeeded"]
+            else:
+                playing = [ip for ip, st in self.status.items()
+                           if st != "succeeded" and self.states.get(ip) == "PLAYING"]
+            self.fleet.record({ip: self.label(ip) for ip in self.coordinators}, playing)
+
+        if self.inventory:
+            for ip, st in self.status.items():
+                if st != "pending":
+                    self.inventory.seen(ip, st == "succeeded")
+            self.inventory.learn(self.room_ip, self.site, self.roster)
+            self.inventory.prune()
+            self.inventory.close()
+
+    # ·· summary ·····································
+    def summary(self):
+        result = {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "action"   : self.action.upper(),
+            "targets"  : [self.names.get(ip) or self.room_name.get(ip) or c.player_name
+                          for ip, c in self.coordinators.items()],
+        }
+        if self.media is not None:
+            result["media"] = self.media
+        if self.guess:
+            result["optimistic"] = {
+                "state_age_s": self.guess["age_s"],
+                "fire_ms"    : self.fire_ms,
+                "verified"   : len(self.states),
+                "flipped"    : self.flipped,
+                "corrected"  : [self.label(ip) for ip in self.corrected],
+            }
+        if self.limiter:
+            result["concurrency"] = self.limiter.summary()
+        if self.hedger and self.hedger.enabled:
+            result["hedge"] = self.hedger.summary()
+        if self.deadline and self.deadline.limited:
+            rooms = {"succeeded": [], "skipped": [], "pending": []}
+            for name, ip in self.room_ip.items():
+                if ip in self.coord_of:
+                    rooms[self.status.get(self.coord_of[ip], "pending")].append(name)
+                else:
+                    rooms[self.unresolved].append(name)
+            result["rooms"]    = rooms
+            result["deadline"] = self.deadline.summary()
+        return result
+
+    def run(self):
+        self.fire()
+        self.discover()
+        self.choose_targets(self.probe())
+        self.act_all()
+        self.remember()
+        return self.summary()
+
+
+def run(room_ip, script, fallback_uri=None):
+    """Toggle every group in room_ip and print the JSON summary."""
+    config.REQUEST_TIMEOUT = REQUEST_TIMEOUT
+    result = SiteToggle(room_ip, script, fallback_uri).run()
+    print(json.dumps(result, indent=2))
+    return result
@@ -0,0 +1,102 @@
+"""
+sonos_state.py  ·  shared local state for the helpers
+────────────────────────────────────────────────────────────
+Where the helpers keep what they learn between runs, and how they write it;
+also how they read a site script's roster without running it.
+
+  $SONOS_STATE_DIR   (default ~/.sonos)
+
+JSON files are written to a temp file and swapped in with os.replace, so a
+reader never sees half a file.  update() holds an advisory lock around its
+read-modify-write, so two site runs finishing together keep each other's
+entries.
+"""
+
+from contextlib import contextmanager
+import ast, json, os, tempfile
+
+try:
+    import fcntl
+except ImportError:                   # no flock – still atomic, just unlocked
+    fcntl = None
+
+STATE_DIR = os.environ.get("SONOS_STATE_DIR", os.path.expanduser("~/.sonos"))
+
+
+def path(name):
+    return os.path.join(STATE_DIR, name)
+
+
+def site_of(script):
+    """'/…/603G_sonos.py' → '603G'."""
+    return os.path.basename(script).split("_")[0].rsplit(".", 1)[0]
+
+
+def roster(path):
+    """{label: ip} from a script's ROOM_IP dict and string *_IP constants."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    out = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        name = getattr(node.targets[0], "id", "")
+        try:
+            value = ast.literal_eval(node.value)
+        except ValueError:
+            continue
+        if name == "ROOM_IP" and isinstance(value, dict):
+            out.update((k, ip) for k, ip in value.items() if isinstance(ip, str))
+        elif name.endswith("_IP") and isinstance(value, str):
+            out.setdefault(name, value)
+    return out
+
+
+# ── JSON files ──────────────────────────────────────────
+def load(file):
+    """Parsed JSON object from file, or {} if missing / unreadable."""
+    try:
+        with open(file) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save(file, data, indent=None):
+    """Write data atomically (temp file + os.replace).  Raises OSError."""
+    folder = os.path.dirname(file) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix="." + os.path.basename(file) + ".")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp, file)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def locked(file):
+    """Exclusive advisory lock on file + '.lock' (no-op without fcntl)."""
+    os.makedirs(os.path.dirname(file) or ".", exist_ok=True)
+    with open(file + ".lock", "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def update(file, fn, indent=None):
+    """fn(data) mutates the file's JSON object in place, under the lock."""
+    with locked(file):
+        data = load(file)
+        fn(data)
+        save(file, data, indent)
@@ -0,0 +1,178 @@
+"""
+sonos_volume.py  ·  diff-only fleet volume normalisation
+────────────────────────────────────────────────────────────
+Brings every room of a site to the levels in a profile file.  All rooms in
+the roster's groups (coordinators and members) are read in parallel, and
+SetVolume goes out – also in parallel – only to the ones that differ.
+
+  python sonos_volume.py apply    SITE_SCRIPT PROFILE [--dry-run]
+  python sonos_volume.py snapshot SITE_SCRIPT PROFILE    current levels → file
+
+PROFILE is JSON keyed by roster label (the ROOM_IP key) or Sonos room name,
+with "*" as the default for rooms not listed; rooms matching neither are
+left alone:
+
+  {"Sonos Port - Kitchen": 25, "Sonos Port - Sauna": 15, "*": 20}
+
+Calls go through sonos_limit's per-site limit when it is available.  The
+report counts writes sent and skipped, and the total wall time.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json, sys, time
+
+from soco import SoCo, config
+
+import sonos_xml
+from sonos_state import roster, site_of
+
+try:
+    import sonos_hot
+except ImportError:
+    sonos_hot = None
+
+try:
+    import sonos_limit
+except ImportError:
+    sonos_limit = None
+
+try:
+    import sonos_inventory
+except ImportError:
+    sonos_inventory = None
+
+config.REQUEST_TIMEOUT = 4
+WORKERS = 8               # without sonos_limit
+
+
+# ── helpers ─────────────────────────────────────────────
+def _map(limiter, fn, items):
+    """[(item, result, error)] – in parallel, under limiter when given."""
+    if limiter:
+        return limiter.map(fn, items)
+
+    def run(item):
+        try:
+            return item, fn(item), None
+        except Exception as e:
+            return item, None, e
+
+    items = list(items)
+    with ThreadPoolExecutor(max_workers=max(1, min(len(items), WORKERS))) as pool:
+        return list(pool.map(run, items))
+
+
+def rooms(room_ip):
+    """Every visible room in the roster's groups → {ip: (label, room name)}."""
+    label   = {ip: name for name, ip in room_ip.items()}
+    pending = list(label)
+    out     = {}
+    while pending:
+        seed = pending.pop(0)
+        try:
+            if sonos_hot:
+                groups = sonos_xml.zone_group_map(sonos_hot.zone_group_state(seed))
+            else:
+                groups = sonos_xml.fetch_zone_groups(SoCo(seed))
+        except Exception as e:
+            print(f"# Skipping {seed}: {e}", file=sys.stderr)
+            continue
+        for g in groups.values():
+            if set(g["ips"]).isdisjoint(label):
+                continue
+            pending = [ip for ip in pending if ip not in g["ips"]]
+            for m in g["members"]:
+                out[m["ip"]] = (label.get(m["ip"]), m["name"])
+    return out
+
+
+def target(profile, label, name):
+    for key in (label, name, "*"):
+        if key in profile:
+            return int(profile[key])
+    return None
+
+
+# ── commands ────────────────────────────────────────────
+def read_volumes(limiter, speakers):
+    got = _map(limiter, lambda ip: SoCo(ip).volume, speakers)
+    for ip, _, err in got:
+        if err is not None:
+            print(f"# {ip}: {err}", file=sys.stderr)
+    return {ip: vol for ip, vol, err in got if err is None}
+
+
+def apply(room_ip, profile, limiter=None, dry_run=False):
+    t0       = time.perf_counter()
+    speakers = rooms(room_ip)
+    current  = read_volumes(limiter, speakers)
+
+    changes, untargeted = {}, 0
+    for ip, vol in current.items():
+        want = target(profile, *speakers[ip])
+        if want is None:
+            untargeted += 1
+        elif want != vol:
+            changes[ip] = (vol, want)
+
+    failed = []
+    if not dry_run:
+        def write(ip):
+            SoCo(ip).volume = changes[ip][1]
+        for ip, _, err in _map(limiter, write, changes):
+            if err is not None:
+                failed.append(ip)
+                print(f"# {ip}: {err}", file=sys.stderr)
+
+    name = lambda ip: speakers[ip][0] or speakers[ip][1] or ip
+    report = {
+        "speakers"    : len(speakers),
+        "read_errors" : len(speakers) - len(current),
+        "writes"      : 0 if dry_run else len(changes) - len(failed),
+        "write_errors": len(failed),
+        "skipped"     : len(current) - untargeted - len(changes),
+        "untargeted"  : untargeted,
+        "changes"     : {name(ip): list(c) for ip, c in changes.items()},
+        "dry_run"     : dry_run,
+        "wall_ms"     : round((time.perf_counter() - t0) * 1000, 1),
+    }
+    if limiter:
+        report["concurrency"] = limiter.summary()
+    return report
+
+
+def snapshot(room_ip, limiter=None):
+    speakers = rooms(room_ip)
+    current  = read_volumes(limiter, speakers)
+    return {(speakers[ip][0] or speakers[ip][1]): vol for ip, vol in current.items()}
+
+
+def main(argv):
+    dry_run = "--dry-run" in argv
+    args    = [a for a in argv if a != "--dry-run"]
+    if len(args) != 3 or args[0] not in ("apply", "snapshot"):
+        raise SystemExit(__doc__)
+    cmd, script, path = args
+
+    room_ip = roster(script)
+    site    = site_of(script)
+    if sonos_inventory:
+        try:
+            inv = sonos_inventory.Inventory()
+            room_ip = inv.resolve(room_ip, site)
+            inv.close()
+        except Exception:
+            pass
+    limiter = sonos_limit.Limiter(site) if sonos_limit else None
+
+    if cmd == "snapshot":
+        with open(path, "w") as f:
+            json.dump(snapshot(room_ip, limiter), f, indent=2)
+        return
+    with open(path) as f:
+        profile = json.load(f)
+    print(json.dumps(apply(room_ip, profile, limiter, dry_run), indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,218 @@
+"""
+sonos_warm.py  ·  background keepalive for idle coordinators
+────────────────────────────────────────────────────────────
+After a quiet spell a Port answers its first request far slower than the
+next ones, and that first request is the user's tap.  A Warmer touches each
+coordinator with a GetTransportInfo over sonos_hot's pooled session, often
+enough to keep it awake and no more often than it has to.
+
+Per speaker the interval adapts:
+  • reply near its warm latency    → interval + STEP   (up to MAX_INTERVAL)
+  • reply with a wake-up penalty   → interval × 0.5    (down to MIN_INTERVAL)
+so it settles just under the speaker's sleep threshold.  The penalised
+replies are what a tap would have paid; the report gives that penalty per
+speaker as the first-call latency saved.
+
+    python sonos_warm.py 603G_sonos.py CC_Sonos.py 192.168.1.50 …
+
+Rosters are read from a script's ROOM_IP dict or its *_IP constants without
+running it.  Status is printed as one JSON line every REPORT_EVERY seconds
+and on Ctrl-C, and written to $SONOS_STATE_DIR/warm.json.
+"""
+
+import json, statistics, sys, threading, time
+
+import sonos_hot
+import sonos_state
+
+try:
+    import sonos_xml
+except ImportError:
+    sonos_xml = None
+
+STATUS_FILE = sonos_state.path("warm.json")
+
+START_INTERVAL = 30.0     # s – first keepalive gap
+MIN_INTERVAL   = 5.0
+MAX_INTERVAL   = 600.0
+STEP           = 15.0     # s added after each warm reply
+PENALTY_FACTOR = 2.0      # cold = slower than warm median × this …
+PENALTY_MIN_MS = 40.0     # … plus this
+SAMPLES        = 30
+TIMEOUT        = 3.0
+TOPOLOGY_EVERY = 600.0    # s between coordinator refreshes
+REPORT_EVERY   = 300.0
+
+
+# ── rosters ─────────────────────────────────────────────
+def roster_ips(path):
+    return list(dict.fromkeys(sonos_state.roster(path).values()))
+
+
+def coordinators(ips):
+    """
+    Coordinator of every group holding one of ips, across every household
+    the roster spans.  Roster IPs no topology could place are kept as-is.
+    """
+    if not sonos_xml:
+        return list(dict.fromkeys(ips))
+    wanted  = set(ips)
+    pending = list(dict.fromkeys(ips))
+    out, failed = [], []
+    while pending:
+        seed = pending.pop(0)
+        try:
+            groups = sonos_xml.zone_group_map(sonos_hot.zone_group_state(seed, TIMEOUT))
+        except Exception:
+            failed.append(seed)
+            continue
+        for coord, g in groups.items():
+            members = set(g["ips"])
+            pending = [ip for ip in pending if ip not in members]
+            failed  = [ip for ip in failed if ip not in members]
+            if wanted & members and coord not in out:
+                out.append(coord)
+    return out + [ip for ip in failed if ip not in out]
+
+
+# ── warmer ──────────────────────────────────────────────
+class _Target:
+    __slots__ = ("ip", "interval", "due", "last", "warm", "cold", "sent", "errors")
+
+    def __init__(self, ip, now):
+        self.ip, self.interval = ip, START_INTERVAL
+        self.due, self.last = now, None
+        self.warm, self.cold = [], []     # reply latencies, ms
+        self.sent = self.errors = 0
+
+
+class Warmer:
+    def __init__(self, ips):
+        self.roster  = list(dict.fromkeys(ips))
+        self.targets = {}
+        self.lock    = threading.Lock()
+        self._stop   = threading.Event()
+        self._topology_at = None
+
+    # ·· scheduling ··································
+    def refresh(self, now=None):
+        """Re-read which roster speakers are coordinators right now."""
+        now = time.monotonic() if now is None else now
+        coords = coordinators(self.roster)
+        with self.lock:
+            for ip in coords:
+                self.targets.setdefault(ip, _Target(ip, now))
+            for ip in list(self.targets):
+                if ip not in coords:
+                    del self.targets[ip]
+        self._topology_at = now
+
+    def touch(self, t, now=None):
+        """One keepalive to t; adapts t.interval from the reply time."""
+        now = time.monotonic() if now is None else now
+        t0 = time.perf_counter()
+        try:
+            sonos_hot.transport_state(t.ip, TIMEOUT)
+        except Exception:
+            t.errors += 1
+            t.due = now + t.interval
+            return
+        ms = (time.perf_counter() - t0) * 1000
+        t.sent += 1
+        warm = statistics.median(t.warm) if len(t.warm) >= 3 else None
+        if warm is not None and ms > warm * PENALTY_FACTOR + PENALTY_MIN_MS:
+            t.cold.append(ms)
+            del t.cold[:-SAMPLES]
+            gap = now - t.last if t.last else t.interval
+            t.interval = max(MIN_INTERVAL, min(t.interval, gap) * 0.5)
+        else:
+            t.warm.append(ms)
+            del t.warm[:-SAMPLES]
+            if t.last is not None:            # the first reply may have been cold
+                t.interval = min(MAX_INTERVAL, t.interval + STEP)
+        t.last = now
+        t.due  = now + t.interval
+
+    def tick(self):
+        """Send whatever is due; returns seconds until the next keepalive."""
+        now = time.monotonic()
+        if self._topology_at is None or now - self._topology_at > TOPOLOGY_EVERY:
+            self.refresh(now)
+        with self.lock:
+            due = [t for t in self.targets.values() if t.due <= now]
+        for t in due:
+            self.touch(t)
+        with self.lock:
+            nxt = min((t.due for t in self.targets.values()), default=now + START_INTERVAL)
+        return max(0.0, nxt - time.monotonic())
+
+    def run(self, report=None):
+        """Loop until stop(); report(summary) every REPORT_EVERY seconds."""
+        reported = time.monotonic()
+        while not self._stop.is_set():
+            wait = self.tick()
+            if report and time.monotonic() - reported >= REPORT_EVERY:
+                report(self.summary())
+                reported = time.monotonic()
+            self._stop.wait(min(wait, REPORT_EVERY))
+
+    def start(self):
+        """Warm in a daemon thread – for a long-running host process."""
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # ·· reporting ···································
+    def summary(self):
+        speakers, saved = {}, 0.0
+        with self.lock:
+            targets = list(self.targets.values())
+        for t in targets:
+            warm = statistics.median(t.warm) if t.warm else None
+            cold = statistics.median(t.cold) if t.cold else None
+            penalty = max(0.0, cold - warm) if warm is not None and cold is not None else None
+            saved += penalty or 0.0
+            speakers[t.ip] = {
+                "interval_s": round(t.interval, 1),
+                "warm_ms"   : round(warm, 1) if warm is not None else None,
+                "cold_ms"   : round(cold, 1) if cold is not None else None,
+                "penalty_ms": round(penalty, 1) if penalty is not None else None,
+                "keepalives": t.sent,
+                "errors"    : t.errors,
+            }
+        return {
+            "timestamp"          : time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "coordinators"       : len(targets),
+            # what one tap per coordinator would have paid had it gone cold
+            "first_call_saved_ms": round(saved, 1),
+            "speakers"        : speakers,
+        }
+
+
+# ── CLI ─────────────────────────────────────────────────
+def _report(summary):
+    print(json.dumps(summary), flush=True)
+    try:
+        sonos_state.save(STATUS_FILE, summary, indent=2)
+    except OSError:
+        pass
+
+
+def main(argv):
+    ips = []
+    for arg in argv:
+        ips += roster_ips(arg) if arg.endswith(".py") else [arg]
+    if not ips:
+        raise SystemExit(__doc__)
+    warmer = Warmer(ips)
+    try:
+        warmer.run(report=_report)
+    except KeyboardInterrupt:
+        pass
+    _report(warmer.summary())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,137 @@
+"""
+sonos_xml.py  ·  streaming topology / favorites parsing
+────────────────────────────────────────────────────────────
+Pulls only what the toggle scripts use out of the two big UPnP payloads:
+
+  • ZoneGroupState  → coordinator IP + member IPs/names per group
+  • Favorites DIDL  → (title, uri) pairs
+
+The topology is small, and a plain fromstring + findall beats streaming it
+(bench_sonos_xml.py: ~20% faster for ~30 KiB more peak).  The favorites
+DIDL is the big one: it is streamed with iterparse, each element cleared
+once read, so no full tree is built and find_favorite stops at its match.
+Imported optionally by the scripts; when it is missing they fall back to
+SoCo's own `.group` / favorites calls.
+"""
+
+from xml.etree.ElementTree import fromstring, iterparse
+import io
+
+DIDL_NS = "urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/"
+DC_NS   = "http://purl.org/dc/elements/1.1/"
+
+_ITEM  = f"{{{DIDL_NS}}}item"
+_RES   = f"{{{DIDL_NS}}}res"
+_TITLE = f"{{{DC_NS}}}title"
+
+
+# ── helpers ─────────────────────────────────────────────
+def _stream(xml):
+    if isinstance(xml, str):
+        xml = xml.encode("utf-8")
+    return io.BytesIO(xml)
+
+
+def location_ip(location):
+    """'http://10.6.2.47:1400/xml/device_description.xml' → '10.6.2.47'"""
+    try:
+        return location.split("//", 1)[1].split(":", 1)[0].split("/", 1)[0]
+    except IndexError:
+        return ""
+
+
+# ── ZoneGroupState ──────────────────────────────────────
+def iter_zone_groups(xml):
+    """
+    Yield one dict per ZoneGroup:
+        {"coordinator": ip,
+         "members"    : [{"uuid", "ip", "name"}, …],   # visible rooms
+         "devices"    : [{"uuid", "ip", "name"}, …],   # every member
+         "ips"        : [ip, …]}                        # every member IP
+    Satellites (surrounds / subs) are skipped; invisible members (the
+    second half of a stereo pair) appear in "devices" / "ips" only.
+    """
+    if isinstance(xml, str):
+        xml = xml.encode("utf-8")
+    for g in fromstring(xml).iter("ZoneGroup"):
+        coord_uuid = g.get("Coordinator")
+        group = {"coordinator": "", "members": [], "devices": [], "ips": []}
+        for m in g.findall("ZoneGroupMember"):          # not the Satellites
+            ip  = location_ip(m.get("Location", ""))
+            dev = {"uuid": m.get("UUID"), "ip": ip, "name": m.get("ZoneName", "")}
+            if dev["uuid"] == coord_uuid:
+                group["coordinator"] = ip
+            group["ips"].append(ip)
+            group["devices"].append(dev)
+            if m.get("Invisible") != "1":
+                group["members"].append(dev)
+        if group["coordinator"]:
+            yield group
+
+
+def zone_group_map(xml):
+    """coordinator ip → group dict (see iter_zone_groups)."""
+    return {g["coordinator"]: g for g in iter_zone_groups(xml)}
+
+
+def group_of(groups, ip):
+    """Group dict (from zone_group_map) that ip belongs to, or None."""
+    for g in groups.values():
+        if ip in g["ips"]:
+            return g
+    return None
+
+
+def fetch_zone_groups(spk):
+    """One GetZoneGroupState round trip from any speaker → zone_group_map."""
+    out = spk.zoneGroupTopology.GetZoneGroupState([])   # [] → no SCPD fetch
+    return zone_group_map(out["ZoneGroupState"])
+
+
+# ── Favorites DIDL ──────────────────────────────────────
+def iter_favorites(didl):
+    """Yield (title, uri) for every <item> in a favorites DIDL-Lite doc."""
+    title = uri = None
+    in_item = False
+    for event, el in iterparse(_stream(didl), events=("start", "end")):
+        tag = el.tag
+        if event == "start":
+            if tag == _ITEM:
+                in_item, title, uri = True, None, None
+            continue
+
+        if not in_item:
+            continue
+        if tag == _TITLE:
+            title = el.text or ""
+        elif tag == _RES:
+            if uri is None:
+                uri = el.text or ""
+        elif tag == _ITEM:
+            in_item = False
+            el.clear()
+            yield title or "", uri or ""
+            continue
+        el.clear()
+
+
+def find_favorite(didl, fav_name):
+    """First favorite URI whose title contains fav_name (stops parsing early)."""
+    needle = fav_name.lower()
+    for title, uri in iter_favorites(didl):
+        if needle in title.lower() and uri:
+            return uri
+    return None
+
+
+def fetch_favorites_didl(spk):
+    """Raw favorites DIDL (FV:2) with only title + res requested."""
+    out = spk.contentDirectory.Browse([
+        ("ObjectID",       "FV:2"),
+        ("BrowseFlag",     "BrowseDirectChildren"),
+        ("Filter",         "dc:title,res"),
+        ("StartingIndex",  0),
+        ("RequestedCount", 0),
+        ("SortCriteria",   ""),
+    ])
+    return out["Result"]
@@ -0,0 +1,6 @@
+"""Run the helper tests against a throwaway state dir, from the repo root."""
+
+import os, sys, tempfile
+
+os.environ["SONOS_STATE_DIR"] = tempfile.mkdtemp(prefix="sonos-test-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
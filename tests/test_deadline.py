@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from sonos_deadline import Deadline, Expired, parse
+
+PHASES = (("discovery", 0.35), ("probe", 0.25), ("action", 0.40))
+
+
+def test_parse():
+    assert parse("1.5s") == 1.5
+    assert parse("1500ms") == 1.5
+    assert parse("2") == 2.0
+
+
+def test_unused_phase_time_rolls_forward():
+    d = Deadline(1.0, PHASES)
+    d.phase("discovery")
+    assert d.phase_remaining() == pytest.approx(0.35, abs=0.02)
+    d.phase("probe")                      # discovery used ~nothing
+    assert d.phase_remaining() == pytest.approx(0.25 / 0.65, abs=0.02)
+    d.phase("action")                     # last phase gets all that is left
+    assert d.phase_remaining() == pytest.approx(d.remaining(), abs=0.01)
+
+
+def test_spent_phase_refuses_calls():
+    d = Deadline(0.05, PHASES)
+    d.phase("discovery")
+    time.sleep(0.03)
+    assert d.exhausted()
+    with pytest.raises(Expired):
+        d.call(lambda: "never sent")
+    assert d.hits == ["discovery"]
+
+
+def test_slow_call_is_abandoned():
+    d = Deadline(0.2, PHASES)
+    d.phase("action")
+    with pytest.raises(Expired):
+        d.call(time.sleep, 1.0)
+    assert d.hits == ["action"]
+
+
+def test_unlimited_passes_through():
+    d = Deadline()
+    d.phase("discovery")
+    assert not d.exhausted()
+    assert d.call(lambda x: x * 2, 21) == 42
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+import sonos_fleet
+from sonos_fleet import Fleet, decide, settled
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "fleet.json")
+
+
+def test_untouched_room_playing_means_pause():
+    assert decide("play", {"b": "PLAYING"}, fired_any=True) == "pause"
+
+
+def test_nothing_fired_and_nothing_playing_means_play():
+    assert decide("pause", {"a": "STOPPED", "b": "PAUSED_PLAYBACK"}, fired_any=False) == "play"
+
+
+def test_quiet_untouched_rooms_cant_contradict_a_fired_pause():
+    assert decide("pause", {"b": "STOPPED"}, fired_any=True) == "pause"
+
+
+def test_no_untouched_rooms_keep_the_guess():
+    assert decide("play", {}, fired_any=True) == "play"
+    assert decide("pause", {}, fired_any=False) == "pause"
+
+
+def test_settled_states():
+    assert settled("play", "TRANSITIONING")
+    assert settled("pause", "NO_MEDIA_PRESENT")
+    assert not settled("pause", "PLAYING")
+
+
+def test_guess_follows_the_last_record(path):
+    Fleet("603G", enable=True, path=path).record({"10.0.0.1": "Kitchen"}, ["10.0.0.1"])
+    guess = Fleet("603G", enable=True, path=path).guess()
+    assert guess["action"] == "pause"
+    assert guess["coordinators"] == {"10.0.0.1": "Kitchen"}
+    Fleet("603G", enable=True, path=path).record({"10.0.0.1": "Kitchen"}, [])
+    assert Fleet("603G", enable=True, path=path).guess()["action"] == "play"
+
+
+def test_no_guess_when_disabled_stale_or_unknown(path, monkeypatch):
+    Fleet("603G", enable=True, path=path).record({"10.0.0.1": "Kitchen"}, [])
+    assert Fleet("603G", enable=False, path=path).guess() is None
+    assert Fleet("CT62", enable=True, path=path).guess() is None
+    monkeypatch.setattr(time, "time", lambda: 10 ** 10)
+    assert Fleet("603G", enable=True, path=path).guess() is None
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from sonos_graph import Graph, StepSkipped
+
+
+def test_independent_steps_overlap():
+    nap = lambda r: time.sleep(0.1)
+    flow = Graph([("a", nap, ()), ("b", nap, ()), ("c", lambda r: "done", ("a", "b"))])
+    assert flow.run()["c"] == "done"
+    assert flow.wall < 0.18
+
+
+def test_step_after_failed_dep_is_skipped():
+    ran = []
+
+    def fail(r):
+        raise ValueError("a")
+
+    flow = Graph([("a", fail, ()), ("b", lambda r: ran.append("b"), ("a",))])
+    with pytest.raises(ValueError):
+        flow.run()
+    assert ran == []
+    assert isinstance(flow.errors["b"], StepSkipped)
+
+
+def test_first_error_in_list_order_is_raised():
+    def slow_fail(r):
+        time.sleep(0.05)
+        raise ValueError("first")
+
+    def fast_fail(r):
+        raise KeyError("second")
+
+    flow = Graph([("first", slow_fail, ()), ("second", fast_fail, ())])
+    with pytest.raises(ValueError, match="first"):
+        flow.run()
+    assert set(flow.errors) == {"first", "second"}
+
+
+def test_system_exit_from_a_step_propagates():
+    def leave(r):
+        raise SystemExit("Unable to read transport state.")
+
+    with pytest.raises(SystemExit):
+        Graph([("state", leave, ())]).run()
+
+
+def test_unknown_dep_is_rejected():
+    with pytest.raises(ValueError):
+        Graph([("a", lambda r: None, ("missing",))])
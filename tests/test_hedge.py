@@ -0,0 +1,59 @@
+import threading, time
+
+import pytest
+
+import sonos_hedge
+from sonos_hedge import Hedger
+
+
+@pytest.fixture
+def hedger(tmp_path):
+    h = Hedger(enable=True, path=str(tmp_path / "latency.json"))
+    h.samples["ip"] = [0.001] * sonos_hedge.MIN_SAMPLES  # p95 → MIN_DELAY
+    return h
+
+
+def nth_call(*behaviours):
+    """fn whose k-th invocation runs behaviours[k]()."""
+    lock, count = threading.Lock(), [0]
+
+    def fn():
+        with lock:
+            k = count[0]
+            count[0] += 1
+        return behaviours[k]()
+    return fn
+
+
+def sleep_then(seconds, value):
+    def run():
+        time.sleep(seconds)
+        return value
+    return run
+
+
+def test_hedge_rate_is_capped(hedger):
+    for _ in range(8):
+        hedger.call("ip", time.sleep, 0.05)
+    assert 1 <= hedger.hedged <= sonos_hedge.MAX_RATE * hedger.calls
+
+
+def test_faster_hedge_wins(hedger):
+    fn = nth_call(sleep_then(0.3, "primary"), sleep_then(0.0, "hedge"))
+    assert hedger.call("ip", fn) == "hedge"
+    assert hedger.hedged == 1
+    assert len(hedger.wins) == 1
+
+
+def test_failed_hedge_waits_for_primary(hedger):
+    def boom():
+        raise OSError("refused")
+    fn = nth_call(sleep_then(0.1, "primary"), boom)
+    assert hedger.call("ip", fn) == "primary"
+    assert hedger.wins == []
+
+
+def test_disabled_passes_through(tmp_path):
+    h = Hedger(enable=False, path=str(tmp_path / "latency.json"))
+    assert h.call("ip", lambda: "value") == "value"
+    assert h.hedged == 0
@@ -0,0 +1,96 @@
+import pytest
+from soco.exceptions import SoCoUPnPException
+
+import sonos_hot
+
+
+def media_info(uri, tracks):
+    return (
+        b'<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+        b'<u:GetMediaInfoResponse xmlns:u="urn:schemas-upnp-org:service:AVTransport:1">'
+        b"<NrTracks>" + tracks + b"</NrTracks><MediaDuration>NOT_IMPLEMENTED</MediaDuration>"
+        b"<CurrentURI>" + uri + b"</CurrentURI><CurrentURIMetaData></CurrentURIMetaData>"
+        b"</u:GetMediaInfoResponse></s:Body></s:Envelope>"
+    )
+
+
+FAULT = (
+    b'<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body><s:Fault>'
+    b"<faultcode>s:Client</faultcode><faultstring>UPnPError</faultstring><detail>"
+    b'<UPnPError xmlns="urn:schemas-upnp-org:control-1-0"><errorCode>701</errorCode>'
+    b"</UPnPError></detail></s:Fault></s:Body></s:Envelope>"
+)
+
+
+class Response:
+    def __init__(self, status, content):
+        self.status_code, self.content = status, content
+        self.text = content.decode()
+
+    def raise_for_status(self):
+        raise AssertionError("only reached for non-SOAP statuses")
+
+
+@pytest.fixture
+def reply(monkeypatch):
+    """Serve one canned response; records (url, SOAPACTION) of each post."""
+    sent = []
+
+    def serve(status, content):
+        def post(url, data, headers, timeout):
+            sent.append((url, headers["SOAPACTION"]))
+            return Response(status, content)
+        monkeypatch.setattr(sonos_hot._session, "post", post)
+        return sent
+    return serve
+
+
+def test_field_slices_first_match():
+    payload = media_info(b"x-rincon-queue:RINCON_A#0", b"12")
+    assert sonos_hot.field(payload, b"NrTracks") == b"12"
+    assert sonos_hot.field(payload, b"CurrentURIMetaData") == b""
+    assert sonos_hot.field(payload, b"Missing") is None
+    assert sonos_hot.field(b"<NrTracks>3", b"NrTracks") is None     # unterminated
+
+
+def test_unescape_decodes_entities():
+    assert sonos_hot.unescape(b"a &amp; b &lt;c&gt;") == "a & b <c>"
+    assert sonos_hot.unescape(b"") == ""
+
+
+def test_has_media_queue_counts_only_with_tracks(reply):
+    sent = reply(200, media_info(b"x-rincon-queue:RINCON_A#0", b"0"))
+    assert sonos_hot.has_media("10.0.0.10") is False
+    assert sent == [("http://10.0.0.10:1400/MediaRenderer/AVTransport/Control",
+                     "urn:schemas-upnp-org:service:AVTransport:1#GetMediaInfo")]
+
+    reply(200, media_info(b"x-rincon-queue:RINCON_A#0", b"4"))
+    assert sonos_hot.has_media("10.0.0.10") is True
+
+
+def test_has_media_stream_and_empty_uri(reply):
+    reply(200, media_info(b"x-sonosapi-stream:s1?sid=254&amp;flags=8224", b"1"))
+    assert sonos_hot.has_media("10.0.0.10") is True
+
+    reply(200, media_info(b"", b"0"))
+    assert sonos_hot.has_media("10.0.0.10") is False
+
+
+def test_transport_state(reply):
+    reply(200, b"<CurrentTransportState>PAUSED_PLAYBACK</CurrentTransportState>")
+    assert sonos_hot.transport_state("10.0.0.10") == "PAUSED_PLAYBACK"
+
+
+def test_fault_raises_with_error_code(reply):
+    reply(500, FAULT)
+    with pytest.raises(SoCoUPnPException) as err:
+        sonos_hot.play("10.0.0.10")
+    assert err.value.error_code == "701"
+    assert "Play on 10.0.0.10" in str(err.value)
+
+
+def test_fault_without_code(reply):
+    reply(500, b"<s:Fault/>")
+    with pytest.raises(SoCoUPnPException) as err:
+        sonos_hot.pause("10.0.0.10")
+    assert err.value.error_code == "unknown"
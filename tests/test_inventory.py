@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from sonos_inventory import Inventory, mac_uid, uid_mac
+
+ROSTER = {"Sonos Port - Kitchen": "10.0.0.44", "Sonos Port - Sauna": "10.0.0.45"}
+
+
+def topology(*devices):
+    """sonos_xml.zone_group_map shape: one group per (uid, name, ip)."""
+    return {ip: {"devices": [{"uuid": uid, "name": name, "ip": ip}]} for uid, name, ip in devices}
+
+
+@pytest.fixture
+def inv():
+    inv = Inventory(":memory:")
+    inv.observe(topology(("RINCON_K", "Kitchen", "10.0.0.44"),
+                         ("RINCON_S", "Sauna", "10.0.0.45")), "603G")
+    inv.learn(ROSTER, "603G")
+    yield inv
+    inv.close()
+
+
+def test_mac_labels():
+    assert mac_uid("Sonos-48A6B82F697A") == "RINCON_48A6B82F697A01400"
+    assert uid_mac("RINCON_48A6B82F697A01400") == "48:A6:B8:2F:69:7A"
+    assert mac_uid("Kitchen") is None
+
+
+def test_unchanged_roster_resolves_as_is(inv):
+    assert inv.resolve(ROSTER, "603G") == ROSTER
+
+
+def test_dhcp_move_follows_the_device(inv):
+    inv.observe(topology(("RINCON_K", "Kitchen", "10.0.0.60")), "603G")
+    assert inv.resolve(ROSTER, "603G")["Sonos Port - Kitchen"] == "10.0.0.60"
+
+
+def test_dhcp_swap_keeps_each_label_on_its_device(inv):
+    inv.observe(topology(("RINCON_K", "Kitchen", "10.0.0.45"),
+                         ("RINCON_S", "Sauna", "10.0.0.44")), "603G")
+    for _ in range(2):                    # resolve runs on every topology read
+        assert inv.resolve(ROSTER, "603G") == {
+            "Sonos Port - Kitchen": "10.0.0.45",
+            "Sonos Port - Sauna"  : "10.0.0.44",
+        }
+    assert inv.by_name("Sonos Port - Kitchen", "603G")["uid"] == "RINCON_K"
+    assert inv.by_name("Sonos Port - Sauna", "603G")["uid"] == "RINCON_S"
+
+
+def test_edited_roster_wins_and_repoints_the_alias(inv):
+    inv.observe(topology(("RINCON_X", "Office", "10.0.0.50")), "603G")
+    edited = dict(ROSTER, **{"Sonos Port - Kitchen": "10.0.0.50"})
+    assert inv.resolve(edited, "603G")["Sonos Port - Kitchen"] == "10.0.0.50"
+    assert inv.by_name("Sonos Port - Kitchen", "603G")["uid"] == "RINCON_X"
+
+
+def test_edit_to_an_unknown_ip_is_used_raw(inv):
+    edited = dict(ROSTER, **{"Sonos Port - Kitchen": "10.0.0.77"})
+    assert inv.resolve(edited, "603G")["Sonos Port - Kitchen"] == "10.0.0.77"
+
+
+def test_learn_records_the_roster_ip(inv):
+    resolved = {"Sonos Port - Kitchen": "10.0.0.45"}
+    inv.observe(topology(("RINCON_K", "Kitchen", "10.0.0.45")), "603G")
+    inv.learn(resolved, "603G", {"Sonos Port - Kitchen": "10.0.0.44"})
+    row = inv.db.execute("SELECT uid, ip FROM aliases WHERE alias = 'Sonos Port - Kitchen'").fetchone()
+    assert tuple(row) == ("RINCON_K", "10.0.0.44")
+
+
+def test_old_database_gains_alias_ips(tmp_path):
+    path = str(tmp_path / "inventory.sqlite")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE aliases (site TEXT NOT NULL, alias TEXT NOT NULL COLLATE NOCASE, "
+               "uid TEXT NOT NULL, PRIMARY KEY (site, alias))")
+    db.commit()
+    db.close()
+    inv = Inventory(path)
+    assert "ip" in [r["name"] for r in inv.db.execute("PRAGMA table_info(aliases)")]
+    inv.close()
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+import sonos_limit
+from sonos_deadline import Expired
+from sonos_limit import Limiter
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    return Limiter("test", path=str(tmp_path / "limits.json"))
+
+
+def fast(item):
+    time.sleep(0.01)
+    return item
+
+
+def failing(item):
+    time.sleep(0.01)
+    raise OSError("timeout")
+
+
+def test_limit_grows_while_calls_stay_fast(limiter):
+    out = limiter.map(fast, range(12))
+    assert [r for _, r, _ in out] == list(range(12))
+    assert limiter.limit > sonos_limit.INITIAL_LIMIT
+    assert limiter.errors == 0
+
+
+def test_errors_halve_the_limit_once_per_window(limiter):
+    out = limiter.map(failing, range(4))             # all four in one window
+    assert all(isinstance(err, OSError) for _, _, err in out)
+    assert limiter.errors == 4
+    assert limiter.limit == sonos_limit.INITIAL_LIMIT * sonos_limit.BACKOFF
+
+
+def test_expired_is_not_overload(limiter):
+    def expire(item):
+        raise Expired("deadline")
+    limiter.map(expire, range(4))
+    assert limiter.errors == 0
+    assert limiter.limit == sonos_limit.INITIAL_LIMIT
+
+
+def test_limit_persists_per_site(tmp_path):
+    path = str(tmp_path / "limits.json")
+    first = Limiter("a", path=path)
+    first.map(fast, range(12))
+    first._save()
+    assert Limiter("a", path=path).limit == pytest.approx(first.limit, abs=0.01)
+    assert Limiter("b", path=path).limit == sonos_limit.INITIAL_LIMIT
@@ -0,0 +1,147 @@
+import pytest
+from soco.exceptions import SoCoException
+
+import sonos_limit
+import sonos_site
+
+
+@pytest.fixture
+def toggle(tmp_path, monkeypatch):
+    monkeypatch.setattr("sys.argv", ["test_sonos.py"])
+    t = sonos_site.SiteToggle({"A": "10.0.0.1", "B": "10.0.0.2"}, "test_sonos.py")
+    t.inventory = None
+    t.limiter   = sonos_limit.Limiter("test", path=str(tmp_path / "limits.json"))
+    t.coordinators = {"10.0.0.1": object(), "10.0.0.2": object()}
+    t.action, t.targets = "pause", list(t.coordinators)
+    return t
+
+
+def test_failed_action_counts_against_the_limit(toggle, monkeypatch):
+    def refuse(ip, c, action):
+        raise SoCoException("UPnP Error 701")
+
+    monkeypatch.setattr(toggle, "send_action", refuse)
+    toggle.act_all()
+    assert toggle.status == {"10.0.0.1": "skipped", "10.0.0.2": "skipped"}
+    assert toggle.limiter.errors == 2
+    assert toggle.limiter.limit < sonos_limit.INITIAL_LIMIT
+
+
+def test_surprise_errors_are_raised(toggle, monkeypatch):
+    def broken(ip, c, action):
+        raise KeyError(ip)
+
+    monkeypatch.setattr(toggle, "send_action", broken)
+    with pytest.raises(KeyError):
+        toggle.act_all()
+
+
+def test_successful_actions(toggle, monkeypatch):
+    sent = []
+    monkeypatch.setattr(toggle, "send_action", lambda ip, c, action: sent.append((ip, action)))
+    toggle.act_all()
+    assert sorted(sent) == [("10.0.0.1", "pause"), ("10.0.0.2", "pause")]
+    assert set(toggle.status.values()) == {"succeeded"}
+    assert toggle.limiter.errors == 0
+
+
+def test_timeouts_are_classified_not_fatal(toggle, monkeypatch):
+    import requests
+
+    def slow(ip, c, action):
+        if ip == "10.0.0.2":
+            raise requests.exceptions.ConnectTimeout("timed out")
+
+    monkeypatch.setattr(toggle, "send_action", slow)
+    toggle.act_all()
+    assert toggle.status == {"10.0.0.1": "succeeded", "10.0.0.2": "skipped"}
+    assert toggle.limiter.errors == 1
+
+
+def test_probe_decides_from_the_rooms_that_answer(toggle, monkeypatch):
+    import requests
+
+    def state(ip, c):
+        if ip == "10.0.0.1":
+            raise requests.exceptions.ConnectTimeout("timed out")
+        return "PLAYING"
+
+    monkeypatch.setattr(toggle, "transport_state", state)
+    assert toggle.probe() is True
+    assert toggle.status == {"10.0.0.1": "skipped"}
+
+
+def test_deadline_cut_leaves_rooms_pending(toggle, monkeypatch):
+    from sonos_deadline import Expired
+
+    def cut(ip, c, action):
+        raise Expired("deadline reached in action phase")
+
+    monkeypatch.setattr(toggle, "send_action", cut)
+    toggle.act_all()
+    assert set(toggle.status.values()) == {"pending"}
+    assert toggle.limiter.errors == 0
+
+
+# ── optimistic correction pass ──────────────────────────
+A, B, C = "10.0.0.1", "10.0.0.2", "10.0.0.3"
+
+
+def optimistic(toggle, action, fired, states, coordinators=(A, B)):
+    toggle.guess  = {"action": action, "coordinators": {ip: ip for ip in fired}, "age_s": 1}
+    toggle.action = action
+    toggle.coordinators = {ip: object() for ip in coordinators}
+    toggle.status = dict(fired)
+    toggle.states = dict(states)
+    toggle.choose_targets(any_playing=False)
+    return toggle.targets
+
+
+def test_failed_fire_in_the_wrong_state_is_retried(toggle):
+    targets = optimistic(toggle, "play", {A: "succeeded", B: "skipped"},
+                         {A: "PLAYING", B: "STOPPED"})
+    assert targets == [B]
+    assert toggle.flipped is False
+
+
+def test_failed_fire_already_settled_is_done(toggle):
+    assert optimistic(toggle, "pause", {A: "succeeded", B: "skipped"},
+                      {A: "PAUSED_PLAYBACK", B: "STOPPED"}) == []
+    assert toggle.status == {A: "succeeded", B: "succeeded"}
+
+
+def test_fired_room_the_probe_missed_is_trusted(toggle):
+    assert optimistic(toggle, "play", {A: "succeeded", B: "succeeded"}, {A: "PLAYING"}) == []
+
+
+def test_new_coordinator_is_targeted(toggle):
+    assert optimistic(toggle, "pause", {A: "succeeded"}, {A: "PAUSED_PLAYBACK"},
+                      coordinators=(A, C)) == [C]
+
+
+def test_contradicted_guess_flips_the_action(toggle):
+    targets = optimistic(toggle, "play", {A: "succeeded"}, {A: "PLAYING", C: "PLAYING"},
+                         coordinators=(A, C))
+    assert toggle.action == "pause" and toggle.flipped
+    assert targets == [A, C]
+
+
+class Speaker:
+    def __init__(self):
+        self.played = []
+
+    def play_uri(self, uri):
+        self.played.append(uri)
+
+
+def test_optimistic_failed_play_gets_the_fallback(toggle, monkeypatch):
+    speakers = {A: Speaker(), B: Speaker()}
+    optimistic(toggle, "play", {A: "succeeded", B: "skipped"}, {A: "PLAYING", B: "STOPPED"})
+    toggle.coordinators, toggle.fallback = speakers, "x-rincon-mp3radio://fallback"
+    monkeypatch.setattr(toggle, "has_media", lambda ip, c: False)
+    monkeypatch.setattr(toggle, "send_action", lambda ip, c, action: pytest.fail("Play sent"))
+    toggle.act_all()
+    assert speakers[B].played == ["x-rincon-mp3radio://fallback"]
+    assert speakers[A].played == []
+    assert toggle.status[B] == "succeeded"
+    assert toggle.summary()["optimistic"]["corrected"] == ["B"]
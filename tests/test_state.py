@@ -0,0 +1,28 @@
+import sonos_state
+
+
+def test_site_of():
+    assert sonos_state.site_of("/srv/603G_sonos.py") == "603G"
+    assert sonos_state.site_of("CC.py") == "CC"
+
+
+def test_roster_reads_constants_without_running(tmp_path):
+    script = tmp_path / "603G_sonos.py"
+    script.write_text(
+        'raise SystemExit("never run")\n'
+        'ROOM_IP = {"Kitchen": "10.0.0.10", "Sauna": "10.0.0.11", "Bad": 7}\n'
+        'HOUSE_IP = "10.0.0.20"\n'
+        'GYM_IP = HOST + ".21"\n'                     # not a literal – skipped
+        'PORT_IP = "10.0.0.10"\n'
+    )
+    assert sonos_state.roster(str(script)) == {
+        "Kitchen": "10.0.0.10", "Sauna": "10.0.0.11",
+        "HOUSE_IP": "10.0.0.20", "PORT_IP": "10.0.0.10",
+    }
+
+
+def test_update_is_read_modify_write(tmp_path):
+    file = str(tmp_path / "s.json")
+    sonos_state.update(file, lambda d: d.setdefault("a", 1))
+    sonos_state.update(file, lambda d: d.update(b=2))
+    assert sonos_state.load(file) == {"a": 1, "b": 2}
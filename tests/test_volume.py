@@ -0,0 +1,70 @@
+import pytest
+
+import sonos_volume
+
+# ip → (roster label, room name)
+SPEAKERS = {
+    "10.0.0.10": ("Kitchen", "Sonos Port - Kitchen"),
+    "10.0.0.11": (None, "Sonos Port - Sauna"),
+    "10.0.0.12": (None, "Sonos Port - Gym"),
+    "10.0.0.13": (None, "Sonos Port - Office"),
+    "10.0.0.14": (None, "Sonos Port - Attic"),
+}
+VOLUMES = {"10.0.0.10": 30, "10.0.0.11": 15, "10.0.0.12": 40, "10.0.0.13": 20}  # Attic unreadable
+
+
+@pytest.fixture
+def fleet(monkeypatch):
+    """Fake rooms / reads / SoCo writes; returns the {ip: volume} writes sent."""
+    written, broken = {}, {"10.0.0.12"}
+
+    class SoCo:
+        def __init__(self, ip):
+            self.ip = ip
+
+        @property
+        def volume(self):
+            return VOLUMES[self.ip]
+
+        @volume.setter
+        def volume(self, value):
+            if self.ip in broken:
+                raise OSError("timed out")
+            written[self.ip] = value
+
+    monkeypatch.setattr(sonos_volume, "SoCo", SoCo)
+    monkeypatch.setattr(sonos_volume, "rooms", lambda room_ip: dict(SPEAKERS))
+    monkeypatch.setattr(sonos_volume, "read_volumes",
+                        lambda limiter, speakers: {ip: VOLUMES[ip] for ip in speakers if ip in VOLUMES})
+    return written
+
+
+# Kitchen by label, Sauna by room name (already right), Gym by "*" (write
+# fails), Office untargeted without "*"
+PROFILE = {"Kitchen": 25, "Sonos Port - Sauna": 15, "Sonos Port - Gym": 35}
+
+
+def test_apply_writes_only_the_differences(fleet):
+    report = sonos_volume.apply({}, PROFILE)
+    assert fleet == {"10.0.0.10": 25}
+    assert report["changes"] == {"Kitchen": [30, 25], "Sonos Port - Gym": [40, 35]}
+    assert (report["speakers"], report["read_errors"]) == (5, 1)
+    assert (report["writes"], report["write_errors"]) == (1, 1)
+    assert (report["skipped"], report["untargeted"]) == (1, 1)
+    assert report["dry_run"] is False
+
+
+def test_default_targets_every_unlisted_room(fleet):
+    report = sonos_volume.apply({}, {"Kitchen": 30, "*": 20})
+    assert fleet == {"10.0.0.11": 20}
+    assert report["untargeted"] == 0
+    assert report["skipped"] == 2           # Kitchen 30, Office 20
+    assert report["write_errors"] == 1      # Gym
+
+
+def test_dry_run_writes_nothing(fleet):
+    report = sonos_volume.apply({}, PROFILE, dry_run=True)
+    assert fleet == {}
+    assert report["writes"] == report["write_errors"] == 0
+    assert len(report["changes"]) == 2
+    assert report["dry_run"] is True
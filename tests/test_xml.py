@@ -0,0 +1,84 @@
+import sonos_xml
+
+LOC = 'Location="http://{}:1400/xml/device_description.xml"'
+
+# Living Room: Arc + two surrounds + sub as satellites.  Kitchen: a stereo
+# pair, the right speaker Invisible.  Office: on its own.
+TOPOLOGY = f"""<ZoneGroupState><ZoneGroups>
+<ZoneGroup Coordinator="RINCON_A" ID="RINCON_A:1">
+  <ZoneGroupMember UUID="RINCON_A" {LOC.format("10.0.0.10")} ZoneName="Living Room">
+    <Satellite UUID="RINCON_LS" {LOC.format("10.0.0.11")} ZoneName="Living Room" Invisible="1"/>
+    <Satellite UUID="RINCON_RS" {LOC.format("10.0.0.12")} ZoneName="Living Room" Invisible="1"/>
+    <Satellite UUID="RINCON_SUB" {LOC.format("10.0.0.13")} ZoneName="Living Room" Invisible="1"/>
+  </ZoneGroupMember>
+  <ZoneGroupMember UUID="RINCON_O" {LOC.format("10.0.0.30")} ZoneName="Office &amp; Den"/>
+</ZoneGroup>
+<ZoneGroup Coordinator="RINCON_KL" ID="RINCON_KL:2">
+  <ZoneGroupMember UUID="RINCON_KR" {LOC.format("10.0.0.21")} ZoneName="Kitchen" Invisible="1"/>
+  <ZoneGroupMember UUID="RINCON_KL" {LOC.format("10.0.0.20")} ZoneName="Kitchen"/>
+</ZoneGroup>
+<ZoneGroup Coordinator="RINCON_GONE" ID="RINCON_GONE:3"></ZoneGroup>
+</ZoneGroups><VanishedDevices/></ZoneGroupState>"""
+
+FAVORITES = """<DIDL-Lite xmlns:dc="http://purl.org/dc/elements/1.1/"
+ xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/"
+ xmlns:r="urn:schemas-rinconnetworks-com:metadata-1-0/"
+ xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/">
+<item id="FV:2/1"><dc:title>KEXP</dc:title>
+  <res protocolInfo="x">x-rincon-mp3radio://kexp?a=1&amp;b=2</res>
+  <r:resMD>&lt;DIDL-Lite&gt;&lt;item&gt;&lt;dc:title&gt;Inner&lt;/dc:title&gt;&lt;/item&gt;&lt;/DIDL-Lite&gt;</r:resMD>
+</item>
+<item id="FV:2/2"><dc:title>Eclectic Rock</dc:title>
+  <res protocolInfo="x">x-sonosapi-stream:s1</res><res protocolInfo="y">second</res>
+</item>
+<item id="FV:2/3"><dc:title>Playlist without res</dc:title></item>
+</DIDL-Lite>"""
+
+
+def test_groups_keyed_by_coordinator_ip():
+    groups = sonos_xml.zone_group_map(TOPOLOGY)
+    assert list(groups) == ["10.0.0.10", "10.0.0.20"]     # empty group dropped
+
+
+def test_satellites_are_not_members():
+    g = sonos_xml.zone_group_map(TOPOLOGY)["10.0.0.10"]
+    assert g["ips"] == ["10.0.0.10", "10.0.0.30"]
+    assert [m["name"] for m in g["members"]] == ["Living Room", "Office & Den"]
+
+
+def test_stereo_pair_hides_the_invisible_half():
+    g = sonos_xml.zone_group_map(TOPOLOGY)["10.0.0.20"]
+    assert g["coordinator"] == "10.0.0.20"
+    assert g["ips"] == ["10.0.0.21", "10.0.0.20"]
+    assert [m["uuid"] for m in g["members"]] == ["RINCON_KL"]
+    assert [d["uuid"] for d in g["devices"]] == ["RINCON_KR", "RINCON_KL"]
+
+
+def test_group_of_finds_invisible_members():
+    groups = sonos_xml.zone_group_map(TOPOLOGY)
+    assert sonos_xml.group_of(groups, "10.0.0.21")["coordinator"] == "10.0.0.20"
+    assert sonos_xml.group_of(groups, "10.0.0.11") is None     # satellite
+    assert sonos_xml.group_of(groups, "10.9.9.9") is None
+
+
+def test_bytes_and_str_parse_alike():
+    assert sonos_xml.zone_group_map(TOPOLOGY.encode()) == sonos_xml.zone_group_map(TOPOLOGY)
+
+
+def test_location_ip():
+    assert sonos_xml.location_ip("http://10.6.2.47:1400/xml/x.xml") == "10.6.2.47"
+    assert sonos_xml.location_ip("") == ""
+
+
+def test_favorites_first_res_and_unescaped():
+    assert list(sonos_xml.iter_favorites(FAVORITES)) == [
+        ("KEXP", "x-rincon-mp3radio://kexp?a=1&b=2"),
+        ("Eclectic Rock", "x-sonosapi-stream:s1"),
+        ("Playlist without res", ""),
+    ]
+
+
+def test_find_favorite():
+    assert sonos_xml.find_favorite(FAVORITES, "eclectic") == "x-sonosapi-stream:s1"
+    assert sonos_xml.find_favorite(FAVORITES, "playlist") is None   # no uri
+    assert sonos_xml.find_favorite(FAVORITES, "inner") is None      # resMD text